@@ -0,0 +1,395 @@
+# PythonUI by Thomas Oberbichler
+# https://github.com/oberbichler/PythonUI
+#
+# Headless benchmarks. Run from the repository root:
+#
+#   python benchmarks/run.py --output results.json
+#   python benchmarks/run.py --compare results.json
+#
+# All timings are in seconds. With --compare the script exits with status 1
+# if a median got slower than the baseline by more than --tolerance.
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+
+def measure(action, repeat=5, setup=None):
+    timings = []
+
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        action()
+        timings.append(time.perf_counter() - start)
+
+    return {
+        'median': statistics.median(timings),
+        'min': min(timings),
+        'max': max(timings),
+        'repeat': repeat,
+    }
+
+
+def run_script(code):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    output = subprocess.check_output([sys.executable, '-c', code], env=env,
+                                     cwd=ROOT)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def measure_script(code, repeat=5):
+    results = [run_script(code) for _ in range(repeat)]
+    timings = [result.pop('time') for result in results]
+
+    return dict(results[-1], **{
+        'median': statistics.median(timings),
+        'min': min(timings),
+        'max': max(timings),
+        'repeat': repeat,
+    })
+
+
+# --- startup
+
+
+IMPORT_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+import python_ui
+elapsed = time.perf_counter() - start
+heavy = [name for name in ('numpy', 'matplotlib') if name in sys.modules]
+print(json.dumps({'time': elapsed, 'heavy_modules': heavy}))
+'''
+
+FIRST_PAINT_SCRIPT = '''
+import json, time
+start = time.perf_counter()
+import python_ui as ui
+from PyQt5 import QtCore
+
+first_paint = []
+
+class Window(ui.ApplicationWindow):
+    def __init__(self):
+        super(Window, self).__init__(title='Benchmark')
+        self.value = ui.Option(0)
+
+    def _build_sidebar(self, builder):
+        for i in range(20):
+            builder.add_spinbox(label=f'Value {i}', option=self.value,
+                                dtype=int)
+        builder.add_stretch()
+
+    def paintEvent(self, event):
+        super(Window, self).paintEvent(event)
+        if not first_paint:
+            first_paint.append(time.perf_counter())
+            QtCore.QTimer.singleShot(0, self.close)
+
+Window.run()
+
+print(json.dumps({'time': first_paint[0] - start}))
+'''
+
+
+def bench_import():
+    return {'import python_ui': measure_script(IMPORT_SCRIPT)}
+
+
+def bench_first_paint():
+    return {'ApplicationWindow.run to first paint':
+            measure_script(FIRST_PAINT_SCRIPT)}
+
+
+# --- in-process benchmarks
+
+
+def bench_builder(app):
+    import python_ui as ui
+    from python_ui.python_ui import Widget, WidgetBuilder
+
+    results = {}
+
+    for n in (100, 1000):
+        def build():
+            widget = Widget()
+            builder = WidgetBuilder(widget._ground, None)
+            option = ui.Option(0)
+            for i in range(n // 4):
+                builder.add_label(f'Label {i}')
+                builder.add_textbox(None, option)
+                builder.add_spinbox(None, option, dtype=int)
+                builder.add_checkbox('Check', option)
+            widget.deleteLater()
+            app.processEvents()
+
+        results[f'WidgetBuilder {n} widgets'] = measure(build, repeat=3)
+
+    return results
+
+
+def bench_array(app):
+    import numpy as np
+    import python_ui as ui
+    from PyQt5 import QtWidgets
+    from python_ui.python_ui import Widget, WidgetBuilder
+
+    results = {}
+
+    widget = Widget()
+    builder = WidgetBuilder(widget._ground, None)
+    option = ui.Option(np.zeros((1, 1)))
+    builder.add_array(option)
+    widget.resize(400, 600)
+    widget.show()
+    view = widget.findChild(QtWidgets.QTableView)
+
+    for shape in [(10, 10), (100, 100), (1000, 100), (2000, 200)]:
+        arrays = [np.random.rand(*shape) for _ in range(5)]
+
+        def replace():
+            option.value = arrays.pop()
+            view.viewport().repaint()
+
+        name = f'add_array replace {shape[0]}x{shape[1]}'
+        results[name] = measure(replace, repeat=5)
+
+        def set_cell():
+            option.value[shape[0] // 2, shape[1] // 2] += 1
+            option.emit()
+            view.viewport().repaint()
+
+        name = f'add_array single cell update {shape[0]}x{shape[1]}'
+        results[name] = measure(set_cell, repeat=5)
+
+    widget.hide()
+    widget.deleteLater()
+    app.processEvents()
+
+    return results
+
+
+def bench_console(app):
+    import python_ui as ui
+    from python_ui.python_ui import Console, LogConsole
+
+    Fore, Back, Style = ui.ConsoleStyles
+
+    nb_lines = 10000
+
+    plain = [f'line {i} with some text\n' for i in range(nb_lines)]
+    colored = [f'{Fore.RED}line {i}{Style.RESET_ALL} with {Fore.GREEN}'
+               f'some{Fore.RESET} text\n' for i in range(nb_lines)]
+
+    results = {}
+
+    cases = [(Console, 'plain', plain), (Console, 'ansi', colored),
+             (LogConsole, 'plain', plain), (LogConsole, 'ansi', colored)]
+
+    for console_type, name, lines in cases:
+        console = console_type()
+        console.resize(600, 400)
+        console.show()
+
+        def write():
+            for line in lines:
+                console.write(line)
+            console.flush()
+            app.processEvents()
+
+        def clear():
+            console.clear()
+
+        result = measure(write, repeat=3, setup=clear)
+        result['lines_per_second'] = nb_lines / result['median']
+        results[f'{console_type.__name__}.write {nb_lines} lines {name}'] = (
+            result)
+
+        console.hide()
+        console.deleteLater()
+        app.processEvents()
+
+    return results
+
+
+def bench_plot(app):
+    import numpy as np
+    from python_ui import PlotCanvas
+
+    x = np.linspace(0, 10, 10000)
+    phase = [0.0]
+
+    class FullPlot(PlotCanvas):
+        def plot(self, ax):
+            ax.set_aspect('auto')
+            ax.plot(x, np.sin(x + phase[0]))
+
+    class IncrementalPlot(PlotCanvas):
+        def init_plot(self, ax):
+            ax.set_aspect('auto')
+            ax.set_ylim(-1.5, 1.5)
+            self.line, = ax.plot(x, np.sin(x))
+            return [self.line]
+
+        def update_plot(self, ax):
+            self.line.set_ydata(np.sin(x + phase[0]))
+
+    results = {}
+
+    for name, canvas_type in (('full', FullPlot),
+                              ('incremental', IncrementalPlot)):
+        canvas = canvas_type(None)
+        canvas.resize(800, 600)
+        canvas.show()
+        canvas.redraw()
+        app.processEvents()
+
+        def redraw():
+            phase[0] += 0.1
+            canvas.redraw()
+            app.processEvents()
+
+        results[f'PlotCanvas.redraw {name}'] = measure(redraw, repeat=10)
+
+        canvas.hide()
+        canvas.deleteLater()
+        app.processEvents()
+
+    return results
+
+
+def bench_option(app):
+    import numpy as np
+    import python_ui as ui
+
+    results = {}
+
+    for nb_slots in (1, 10, 100):
+        option = ui.Option(0)
+        for _ in range(nb_slots):
+            option.connect(lambda value: None)
+
+        def emit():
+            for i in range(1000):
+                option.value = i
+
+        results[f'Option 1000 changes x {nb_slots} slots'] = measure(emit)
+
+    array = np.random.rand(1000, 1000)
+    option = ui.Option(array, compare=True)
+    option.connect(lambda value: None)
+
+    def assign_unchanged():
+        option.value = array.copy()
+
+    name = 'Option compare unchanged 1000x1000 array'
+    results[name] = measure(assign_unchanged)
+
+    return results
+
+
+BENCHMARKS = ['import', 'first_paint', 'builder', 'array', 'console', 'plot',
+              'option']
+
+
+SUBPROCESS_BENCHMARKS = ['import', 'first_paint']
+
+
+def run(names):
+    from PyQt5 import QtWidgets
+
+    results = {}
+
+    app = None
+
+    for name in names:
+        bench = globals()['bench_' + name]
+
+        if name in SUBPROCESS_BENCHMARKS:
+            results.update(bench())
+            continue
+
+        if app is None:
+            app = QtWidgets.QApplication.instance()
+        if app is None:
+            app = QtWidgets.QApplication([])
+
+        results.update(bench(app))
+
+    return results
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]['median']
+        new = result['median']
+        ratio = new / old if old > 0 else 1
+        marker = ''
+        if ratio > 1 + tolerance:
+            marker = '  REGRESSION'
+            regressions.append(name)
+        if (result.get('heavy_modules') and
+                not baseline[name].get('heavy_modules')):
+            marker += '  IMPORTS ' + ', '.join(result['heavy_modules'])
+            regressions.append(name)
+        print(f'{name:55s} {old:10.5f} {new:10.5f} {ratio:6.2f}x{marker}')
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('benchmarks', nargs='*',
+                        help='any of: ' + ', '.join(BENCHMARKS))
+    parser.add_argument('--output', help='write the results as JSON')
+    parser.add_argument('--compare', help='baseline JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error(f'unknown benchmark "{name}"')
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    results = run(args.benchmarks or BENCHMARKS)
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        sys.exit(1 if regressions else 0)
+
+    if not args.output:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
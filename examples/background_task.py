@@ -0,0 +1,90 @@
+import python_ui as ui
+import time
+
+
+class Window(ui.ApplicationWindow):
+    def __init__(self):
+        super(Window, self).__init__(
+            title='Example',
+        )
+
+        self.steps = ui.Option(
+            value=50,
+        )
+
+        self.progress = ui.Option(
+            value=0,
+        )
+
+        self.result = ui.Option(
+            value='',
+        )
+
+        self.task = None
+
+    def compute(self, task):
+        # Runs on a worker thread. Report progress and check for cancellation
+        # regularly; results are delivered to the options on the GUI thread
+
+        total = 0
+
+        for i in range(self.steps.value):
+            task.check_cancelled()
+            time.sleep(0.05)
+            total += i
+            task.report_progress(i + 1)
+            print(f'Step {i + 1} of {self.steps.value}')
+
+        return total
+
+    def start(self):
+        self.task = self.run_task(
+            self.compute,
+            result=self.result,
+            progress=self.progress,
+        )
+
+    def cancel(self):
+        if self.task:
+            self.task.cancel()
+
+    def _build_sidebar(self, builder):
+        builder.add_spinbox(
+            label='Number of steps:',
+            option=self.steps,
+            dtype=int,
+            minimum=1,
+        )
+
+        builder.add_button(
+            label='Start',
+            action=self.start,
+        )
+
+        builder.add_button(
+            label='Cancel',
+            action=self.cancel,
+        )
+
+        builder.add_textbox(
+            label='Progress:',
+            option=self.progress,
+            readonly=True,
+        )
+
+        builder.add_textbox(
+            label='Result:',
+            option=self.result,
+            readonly=True,
+        )
+
+        builder.add_button(
+            label='Run in background without blocking the window',
+            action=lambda task: print('Sum:', self.compute(task)),
+            background=True,
+        )
+
+        builder.add_stretch()
+
+
+Window.run()
@@ -0,0 +1,49 @@
+import python_ui as ui
+import numpy as np
+
+
+class Plot(ui.PlotCanvas):
+    def init_plot(self, ax):
+        # Create the artists once. The returned artists are redrawn on top of
+        # a cached background when only their data changes
+
+        ax.set_aspect('auto')
+        ax.set_xlim(0, 10)
+        ax.set_ylim(-1.5, 1.5)
+
+        self.x = np.linspace(0, 10, 1000)
+        self.line, = ax.plot(self.x, np.sin(self.x))
+
+        return [self.line]
+
+    def update_plot(self, ax):
+        phase = self.window().phase.value
+        self.line.set_ydata(np.sin(self.x + phase))
+
+
+class Window(ui.ApplicationWindow):
+    def __init__(self):
+        super(Window, self).__init__(
+            title='Example',
+            content=Plot,
+        )
+
+        self.phase = ui.Option(
+            value=0,
+            action=self.content.request_redraw,
+        )
+
+    def _build_sidebar(self, builder):
+        builder.add_wheel(
+            label='Phase:',
+            option=self.phase,
+            default=0,
+        )
+
+        builder.add_stretch()
+
+    def _started(self):
+        self.content.redraw()
+
+
+Window.run()
@@ -0,0 +1,67 @@
+import python_ui as ui
+import numpy as np
+
+
+def sweep(x, nb_samples):
+    # Runs in a worker process. Must be a module-level function so it can be
+    # sent to the process pool. Large arrays are passed via shared memory
+
+    amplitudes = np.linspace(0, 1, nb_samples)
+    return np.sin(np.outer(amplitudes, x)).sum(axis=0)
+
+
+class Plot(ui.PlotCanvas):
+    def plot(self, ax):
+        window = self.window()
+        ax.set_aspect('auto')
+        ax.plot(window.x, window.y.value)
+
+
+class Window(ui.ApplicationWindow):
+    def __init__(self):
+        self.x = np.linspace(0, 10, 1000)
+
+        self.nb_samples = ui.Option(
+            value=1000,
+        )
+
+        self.y = ui.Option(
+            value=np.zeros_like(self.x),
+        )
+
+        super(Window, self).__init__(
+            title='Example',
+            content=Plot,
+            executor='process',
+        )
+
+    def start(self):
+        self.run_task(
+            sweep,
+            self.x,
+            self.nb_samples.value,
+            result=self.y,
+            redraw=self.content,
+        )
+
+    def _build_sidebar(self, builder):
+        builder.add_spinbox(
+            label='Number of samples:',
+            option=self.nb_samples,
+            dtype=int,
+            minimum=1,
+        )
+
+        builder.add_button(
+            label='Run sweep in a worker process',
+            action=self.start,
+        )
+
+        builder.add_stretch()
+
+
+# Worker processes import this module again, so the window must only be
+# started from the main process
+
+if __name__ == '__main__':
+    Window.run()
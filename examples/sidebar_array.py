@@ -20,28 +20,32 @@ class Window(ui.ApplicationWindow):
 
         self.array = ui.Option(
             value=np.eye(1),
-            action=self.compute_matrix_info,
         )
 
-        self.sum = ui.Option(
-            value=1,
+        # Derived values are recomputed automatically, at most once per
+        # change of the array
+
+        self.sum = ui.ComputedOption(
+            fn=np.sum,
+            deps=[self.array],
         )
 
-        self.det = ui.Option(
-            value=1,
+        self.det = ui.ComputedOption(
+            fn=self.compute_det,
+            deps=[self.array],
         )
 
     def resize_array(self):
         self.array.change(np.random.rand(self.nb_rows.value,
                                          self.nb_cols.value))
 
-    def compute_matrix_info(self):
-        self.sum.change(np.sum(self.array.value))
+    def compute_det(self, array):
+        rows, cols = array.shape
 
-        if self.nb_rows.value == self.nb_cols.value:
-            self.det.change(np.linalg.det(self.array.value))
+        if rows == cols:
+            return np.linalg.det(array)
         else:
-            self.det.change(None)
+            return None
 
     def _build_sidebar(self, builder):
         builder.add_spinbox(
@@ -1,6 +1,19 @@
 from .python_ui import ApplicationWindow
+from .python_ui import CellFormat
+from .python_ui import ComputedOption
 from .python_ui import ConsoleStyles
 from .python_ui import Option
-from .python_ui import PlotCanvas
+from .python_ui import Task
+from .python_ui import TaskCancelled
 from .python_ui import Widget
 from .python_ui import copy_to_clipboard
+from .python_ui import profiler
+from .python_ui import run_task
+
+
+def __getattr__(name):
+    # matplotlib is only imported once a PlotCanvas is actually used
+    if name == 'PlotCanvas':
+        from .plot_canvas import PlotCanvas
+        return PlotCanvas
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
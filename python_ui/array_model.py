@@ -0,0 +1,1184 @@
+# PythonUI by Thomas Oberbichler
+# https://github.com/oberbichler/PythonUI
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+from .python_ui import ARRAY_MIME_TYPE, copy_to_clipboard, profiler
+import collections
+import io
+import numpy as np
+import sys
+
+
+def _field_names(array):
+    dtype = getattr(array, 'dtype', None)
+    return dtype.names if dtype is not None else None
+
+
+def _changed(old, new):
+    changed = old != new
+
+    if np.issubdtype(new.dtype, np.inexact):
+        changed &= ~(np.isnan(old) & np.isnan(new))
+
+    return changed
+
+
+def _changed_mask(old, new, rows, cols):
+    if new.dtype.names:
+        changed = [_changed(old[name][:rows], new[name][:rows])
+                   for name in new.dtype.names]
+        # fields holding subarrays differ if any element differs
+        changed = [c.any(axis=tuple(range(1, c.ndim))) if c.ndim > 1 else c
+                   for c in changed]
+        return np.stack(changed, axis=1)
+
+    return _changed(old[:rows, :cols], new[:rows, :cols])
+
+
+def _format_floats(values, cell_format):
+    precision = cell_format.precision
+    notation = cell_format.notation
+
+    if notation == 'engineering':
+        if precision is None:
+            precision = 3
+        return _format_engineering(values, precision)
+
+    if precision is None:
+        if notation == 'general':
+            return values.astype(str)
+        precision = 6
+
+    code = {'general': 'g', 'fixed': 'f', 'scientific': 'e'}[notation]
+
+    return np.char.mod(f'%.{precision}{code}', values)
+
+
+def _format_engineering(values, precision):
+    # mantissa in [1, 1000) and an exponent that is a multiple of three
+
+    magnitude = np.abs(values)
+    valid = np.isfinite(values) & (magnitude > 0)
+
+    exponent = np.zeros(values.shape, dtype=int)
+    exponent[valid] = np.floor(np.log10(magnitude[valid]) / 3) * 3
+
+    mantissa = values / 10.0 ** exponent
+
+    # rounding may carry the mantissa to 1000
+    carry = np.abs(np.round(mantissa, precision)) >= 1000
+    mantissa[carry] /= 1000
+    exponent[carry] += 3
+
+    text = np.char.mod(f'%.{precision}f', mantissa)
+
+    return np.char.add(np.char.add(text, 'e'), exponent.astype(str))
+
+
+def _format_values(values, cell_format):
+    # text of a column of cells, vectorized over the whole column
+
+    values = np.asarray(values)
+    kind = values.dtype.kind
+
+    if values.ndim != 1:
+        return [str(value) for value in values]
+
+    if kind in 'fc' and cell_format is not None:
+        if kind == 'c':
+            real = _format_floats(values.real, cell_format)
+            imag = _format_floats(np.abs(values.imag), cell_format)
+            sign = np.where(np.signbit(values.imag), '-', '+')
+            text = np.char.add(np.char.add(real, sign),
+                               np.char.add(imag, 'j'))
+        else:
+            text = _format_floats(values, cell_format)
+
+        text = np.where(np.isnan(values), cell_format.nan, text)
+
+        if kind == 'f':
+            text = np.where(np.isposinf(values), cell_format.inf, text)
+            text = np.where(np.isneginf(values), '-' + cell_format.inf,
+                            text)
+
+        return text
+
+    if kind == 'S':
+        return np.char.decode(values, 'latin-1')
+
+    if kind in 'biufcU':
+        return values.astype(str)
+
+    return [str(value) for value in values]
+
+
+def _heat_colors():
+    # diverging blue - light gray - red color map with 256 levels
+
+    anchors = [(59, 76, 192), (221, 221, 221), (180, 4, 38)]
+
+    colors = []
+
+    for i in range(256):
+        t = i / 255 * 2
+        segment = min(int(t), 1)
+        t -= segment
+
+        start, end = anchors[segment], anchors[segment + 1]
+
+        colors.append(QtGui.QColor(*[round(a + (b - a) * t)
+                                     for a, b in zip(start, end)]))
+
+    return colors
+
+
+_HEAT_COLORS = _heat_colors()
+
+
+class ArrayModel(QtCore.QAbstractTableModel):
+    edited = QtCore.pyqtSignal()
+    shape_changed = QtCore.pyqtSignal()
+    sort_reset = QtCore.pyqtSignal()
+
+    # memory-mapped and other out-of-core arrays are read in tiles of
+    # tile_shape cells, the max_tiles most recently viewed are kept
+
+    tile_shape = (128, 32)
+    max_tiles = 64
+
+    def __init__(self, array, readonly=False):
+        super(ArrayModel, self).__init__()
+        self._readonly = readonly
+        self._source = None
+        self._row_axis = 0
+        self._col_axis = None
+        self._indices = {}
+        self._array = None
+        self._fields = None
+        self._shape = (0, 0)
+        self._snapshot = None
+        self._tiles = collections.OrderedDict()
+        self._text_tiles = collections.OrderedDict()
+        self._columns = {}
+        self._ranges = {}
+        self._order = None
+        self._sort_column = None
+        self._sort_order = QtCore.Qt.AscendingOrder
+        self._formats = {}
+        self._heatmap = False
+        self.set_array(array)
+
+    @staticmethod
+    def _is_lazy(array):
+        if isinstance(array, np.memmap):
+            return True
+        if isinstance(array, (np.ndarray, list, tuple)):
+            return False
+        return hasattr(array, '__getitem__') and hasattr(array, 'shape')
+
+    @staticmethod
+    def _table_shape(array):
+        shape = np.shape(array)
+
+        if len(shape) == 1:
+            fields = _field_names(array)
+            return shape[0], len(fields) if fields else 1
+        elif len(shape) == 2:
+            return shape
+        else:
+            raise Exception('Arrays with dimension > 2 not supported')
+
+    def _index(self, row, col):
+        if np.ndim(self._array) == 1:
+            return row
+        return row, col
+
+    def array(self):
+        return self._array
+
+    def source(self):
+        return self._source
+
+    def slice(self):
+        return self._row_axis, self._col_axis, dict(self._indices)
+
+    def dtype(self):
+        dtype = getattr(self._array, 'dtype', None)
+
+        if dtype is None:
+            return np.asarray(self._array).dtype
+
+        return np.dtype(dtype)
+
+    def editable(self):
+        # e.g. memory maps opened with mode='r'. Of plain sequences only
+        # lists can be written back
+
+        if not hasattr(self._array, 'dtype'):
+            return not self._readonly and isinstance(self._array, list)
+
+        flags = getattr(self._array, 'flags', None)
+        return not self._readonly and getattr(flags, 'writeable', True)
+
+    def set_formats(self, formats):
+        # a CellFormat for all columns, or a dict keyed by column index or
+        # field name
+
+        if formats is None or isinstance(formats, dict):
+            self._formats = dict(formats or {})
+        else:
+            self._formats = {None: formats}
+
+        self._clear_caches()
+        self._emit_all_changed()
+
+    def set_heatmap(self, enabled):
+        self._heatmap = enabled
+        self._clear_caches()
+        self._emit_all_changed()
+
+    def _column_format(self, col):
+        formats = self._formats
+
+        if col in formats:
+            return formats[col]
+
+        if self._fields and self._fields[col] in formats:
+            return formats[self._fields[col]]
+
+        return formats.get(None)
+
+    def block(self, top, left, bottom, right):
+        if self._order is None:
+            return self._source_block(top, left, bottom, right)
+
+        rows = self._order[top:bottom + 1]
+        first = rows.min()
+
+        block = self._source_block(first, left, rows.max(), right)
+
+        return block[rows - first]
+
+    def _source_block(self, top, left, bottom, right):
+        if self._fields:
+            records = np.asarray(self._array[top:bottom + 1])
+            return records[list(self._fields[left:right + 1])]
+        if np.ndim(self._array) == 1:
+            return np.asarray(self._array[top:bottom + 1]).reshape(-1, 1)
+        if isinstance(self._array, (list, tuple)):
+            rows = np.asarray(self._array[top:bottom + 1])
+            return rows[:, left:right + 1]
+        return np.asarray(self._array[top:bottom + 1, left:right + 1])
+
+    @staticmethod
+    def _as_table(array):
+        array = np.asarray(array)
+        if array.ndim == 1 and array.dtype.names is None:
+            return array.reshape(-1, 1)
+        return array
+
+    @profiler.timed('add_array refresh')
+    def set_array(self, array):
+        shape = np.shape(array)
+        fields = _field_names(array)
+
+        source = self._source
+
+        if (source is None or len(shape) != np.ndim(source) or
+                fields != _field_names(source)):
+            # show the last axes, e.g. nodes x components of the first
+            # time step. Fields of structured arrays are the columns
+
+            if fields or len(shape) < 2:
+                self._row_axis = max(len(shape) - 1, 0)
+                self._col_axis = None
+            else:
+                self._row_axis = len(shape) - 2
+                self._col_axis = len(shape) - 1
+
+            self._indices = {}
+
+        self._source = array
+
+        self._set_table(self._view(array))
+
+        if source is None or shape != np.shape(source):
+            self.shape_changed.emit()
+
+    def set_slice(self, row_axis, col_axis=None, indices=None):
+        self._row_axis = row_axis
+        self._col_axis = col_axis
+
+        if indices is not None:
+            self._indices = dict(indices)
+
+        self._set_table(self._view(self._source))
+
+    def _view(self, array):
+        shape = np.shape(array)
+
+        if len(shape) <= (1 if _field_names(array) else 2):
+            return array
+
+        # basic indexing keeps this a view of the source
+
+        displayed = self._row_axis, self._col_axis
+
+        index = tuple(slice(None) if axis in displayed else
+                      max(min(self._indices.get(axis, 0), size - 1), 0)
+                      for axis, size in enumerate(shape))
+
+        view = array[index]
+
+        if self._col_axis is not None and self._row_axis > self._col_axis:
+            view = view.T
+
+        return view
+
+    def _set_table(self, array):
+        shape = self._table_shape(array)
+
+        self._tiles.clear()
+
+        if self._is_lazy(array):
+            self._set_lazy_array(array, shape)
+            return
+
+        snapshot = self._snapshot
+
+        if (snapshot is None or np.ndim(array) != np.ndim(self._array) or
+                np.asarray(array).dtype != snapshot.dtype):
+            self.beginResetModel()
+            self._array = array
+            self._fields = _field_names(array)
+            self._shape = shape
+            self._snapshot = np.array(self._as_table(array), copy=True)
+            self._order = None
+            self._clear_caches()
+            self.endResetModel()
+            self._clear_sort()
+            return
+
+        rows = min(self._shape[0], shape[0])
+        cols = min(self._shape[1], shape[1])
+
+        # a sort order only fits the old number of rows. Show the rows
+        # unsorted while resizing and sort again afterwards
+
+        resort = self._order is not None and shape[0] != self._shape[0]
+
+        if resort:
+            self._set_order(None)
+
+        ranges = {}
+
+        if shape != self._shape:
+            ranges = self._heat_ranges(0, cols - 1)
+            self._drop_edges(rows, cols)
+
+        self._resize(array, shape)
+
+        new = self._as_table(array)
+
+        changed = _changed_mask(snapshot, new, rows, cols)
+
+        self._snapshot = np.array(new, copy=True)
+
+        self._emit_changed(changed)
+        self._emit_heat_changed(ranges)
+
+        if resort:
+            self._resort()
+
+    def _set_lazy_array(self, array, shape):
+        # without a snapshot there is nothing to diff against. The view only
+        # requests the visible cells again
+
+        if self._snapshot is not None or self._array is None or (
+                shape != self._shape or
+                _field_names(array) != self._fields):
+            self.beginResetModel()
+            self._array = array
+            self._fields = _field_names(array)
+            self._shape = shape
+            self._snapshot = None
+            self._order = None
+            self._clear_caches()
+            self.endResetModel()
+            self._clear_sort()
+            return
+
+        self._array = array
+
+        self._clear_caches()
+        self._emit_all_changed()
+        self._resort()
+
+    def _emit_all_changed(self):
+        rows, cols = self._shape
+
+        if rows and cols:
+            self.dataChanged.emit(self.index(0, 0),
+                                  self.index(rows - 1, cols - 1))
+
+    def _clear_caches(self):
+        self._text_tiles.clear()
+        self._columns.clear()
+        self._ranges.clear()
+
+    def _drop_edges(self, rows, cols):
+        # tiles reaching past the rows and columns that are kept were cut
+        # at the old table size
+
+        tile_rows, tile_cols = self.tile_shape
+
+        for key in list(self._text_tiles):
+            if (key[0] + 1) * tile_rows > rows or (
+                    (key[1] + 1) * tile_cols > cols):
+                del self._text_tiles[key]
+
+        self._columns.clear()
+        self._ranges.clear()
+
+    def _invalidate(self, top, left, bottom, right):
+        # drop cached text of the source cells. With a heatmap the color
+        # range of the whole column may change
+
+        tile_rows, tile_cols = self.tile_shape
+
+        tile_cols = range(left // tile_cols, right // tile_cols + 1)
+        tile_rows = range(top // tile_rows, bottom // tile_rows + 1)
+
+        for key in list(self._text_tiles):
+            if key[1] in tile_cols and (self._heatmap or key[0] in tile_rows):
+                del self._text_tiles[key]
+
+        for col in range(left, right + 1):
+            self._columns.pop(col, None)
+            self._ranges.pop(col, None)
+
+    def _heat_ranges(self, left, right):
+        # color ranges of the columns before an edit, see _emit_heat_changed
+
+        if not self._heatmap:
+            return {}
+
+        return {col: self._ranges.get(col) for col in range(left, right + 1)}
+
+    def _emit_heat_changed(self, ranges):
+        # the colors of a whole column change with its range. Columns that
+        # were never painted have no range yet
+
+        for col, old in ranges.items():
+            if old is not None and old != self._range(col):
+                self.dataChanged.emit(self.index(0, col),
+                                      self.index(self._shape[0] - 1, col),
+                                      [QtCore.Qt.BackgroundRole])
+
+    def _tile(self, tile_row, tile_col):
+        key = tile_row, tile_col
+
+        tile = self._tiles.get(key)
+
+        if tile is not None:
+            self._tiles.move_to_end(key)
+            return tile
+
+        tile_rows, tile_cols = self.tile_shape
+
+        top = tile_row * tile_rows
+        left = tile_col * tile_cols
+
+        tile = self._source_block(top, left, top + tile_rows - 1,
+                                  left + tile_cols - 1)
+
+        self._tiles[key] = tile
+
+        if len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+
+        return tile
+
+    def _text_tile(self, tile_row, tile_col):
+        # formatted text and heatmap levels of a tile, computed with numpy
+        # for all its cells at once and kept until the data changes
+
+        key = tile_row, tile_col
+
+        tile = self._text_tiles.get(key)
+
+        if tile is not None:
+            self._text_tiles.move_to_end(key)
+            return tile
+
+        tile_rows, tile_cols = self.tile_shape
+
+        top = tile_row * tile_rows
+        left = tile_col * tile_cols
+        bottom = min(top + tile_rows, self._shape[0]) - 1
+        right = min(left + tile_cols, self._shape[1]) - 1
+
+        if self._snapshot is None:
+            block = self._tile(tile_row, tile_col)
+        else:
+            block = self._source_block(top, left, bottom, right)
+
+        texts = np.empty((bottom - top + 1, right - left + 1), dtype=object)
+        levels = np.full(texts.shape, -1, dtype=np.int16)
+
+        for i, col in enumerate(range(left, right + 1)):
+            if self._fields:
+                values = block[self._fields[col]]
+            else:
+                values = block[:, i]
+
+            texts[:, i] = _format_values(values, self._column_format(col))
+
+            if self._heatmap:
+                levels[:, i] = self._levels(col, values)
+
+        tile = texts, levels
+
+        self._text_tiles[key] = tile
+
+        if len(self._text_tiles) > self.max_tiles:
+            self._text_tiles.popitem(last=False)
+
+        return tile
+
+    def _column(self, col):
+        # entire column in source order, shared by sorting and heatmap
+
+        values = self._columns.get(col)
+
+        if values is None:
+            block = self._source_block(0, col, self._shape[0] - 1, col)
+
+            if self._fields:
+                values = np.asarray(block[self._fields[col]])
+            else:
+                values = np.asarray(block[:, 0])
+
+            self._columns[col] = values
+
+        return values
+
+    def _range(self, col):
+        # (min, max) of the finite values in a column, cached for all tiles
+
+        bounds = self._ranges.get(col)
+
+        if bounds is None:
+            column = self._column(col)
+
+            if column.dtype.kind in 'biuf' and column.ndim == 1:
+                column = column.astype(float)
+                column = column[np.isfinite(column)]
+
+            if column.dtype.kind in 'biuf' and len(column):
+                bounds = column.min(), column.max()
+            else:
+                bounds = ()
+
+            self._ranges[col] = bounds
+
+        return bounds
+
+    def _levels(self, col, values):
+        if values.dtype.kind not in 'biuf' or values.ndim != 1:
+            return -1
+
+        bounds = self._range(col)
+
+        if not bounds:
+            return -1
+
+        low, high = bounds
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            levels = (values - low) / (high - low) if high > low else (
+                np.zeros(len(values)))
+
+        levels = np.round(np.clip(levels, 0, 1) * 255)
+
+        return np.where(np.isfinite(values), levels, -1)
+
+    def _set_order(self, order):
+        self.layoutAboutToBeChanged.emit()
+        self._order = order
+        self.layoutChanged.emit()
+
+        if self._shape[0]:
+            self.headerDataChanged.emit(QtCore.Qt.Vertical, 0,
+                                        self._shape[0] - 1)
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        if column < 0 or column >= self._shape[1]:
+            self._sort_column = None
+            if self._order is not None:
+                self._set_order(None)
+            return
+
+        self._sort_column = column
+        self._sort_order = order
+
+        rows = np.argsort(self._column(column), kind='stable')
+
+        if order == QtCore.Qt.DescendingOrder:
+            rows = rows[::-1]
+
+        self._set_order(rows)
+
+    def _resort(self, left=0, right=None):
+        # sort again if values in the sorted column changed
+
+        column = self._sort_column
+
+        if column is None:
+            return
+
+        if column >= self._shape[1]:
+            self._clear_sort()
+        elif left <= column and (right is None or column <= right):
+            self.sort(column, self._sort_order)
+
+    def _clear_sort(self):
+        if self._sort_column is None and self._order is None:
+            return
+
+        self._sort_column = None
+
+        if self._order is not None:
+            self._set_order(None)
+
+        self.sort_reset.emit()
+
+    def _source_row(self, row):
+        if self._order is None:
+            return row
+        return int(self._order[row])
+
+    def _value(self, row, col):
+        if self._snapshot is not None:
+            if self._fields:
+                return self._array[row][self._fields[col]]
+            return self._array[self._index(row, col)]
+
+        tile_rows, tile_cols = self.tile_shape
+
+        tile = self._tile(row // tile_rows, col // tile_cols)
+
+        if self._fields:
+            return tile[row % tile_rows][self._fields[col]]
+
+        return tile[row % tile_rows, col % tile_cols]
+
+    def _write(self, top, left, bottom, right, value):
+        if self._order is None:
+            rows = slice(top, bottom + 1)
+        else:
+            rows = self._order[top:bottom + 1]
+            top, bottom = rows.min(), rows.max()
+
+        cols = slice(left, right + 1)
+
+        self._invalidate(top, left, bottom, right)
+
+        if self._fields:
+            value = np.asarray(value)
+            for i, name in enumerate(self._fields[cols]):
+                column = value if value.ndim == 0 else value[:, i]
+                self._array[name][rows] = column
+        elif isinstance(self._array, list):
+            # edit a copy and write it back into the list of the option
+            table = np.array(self._as_table(self._array))
+            table[rows, cols] = value
+            self._array[:] = table.reshape(np.shape(self._array)).tolist()
+        elif self._snapshot is not None:
+            self._as_table(self._array)[rows, cols] = value
+        elif np.ndim(self._array) == 1:
+            if np.ndim(value):
+                value = np.reshape(value, -1)
+            self._array[rows] = value
+        else:
+            self._array[rows, cols] = value
+
+        if self._snapshot is not None:
+            table = self._as_table(self._array)
+            if self._fields:
+                self._snapshot[rows] = table[rows]
+            else:
+                self._snapshot[rows, cols] = table[rows, cols]
+            return
+
+        # written through to the underlying storage, e.g. the mapped file
+
+        flush = getattr(self._array, 'flush', None)
+
+        if flush is not None:
+            flush()
+
+        self._tiles.clear()
+
+    def _resize(self, array, shape):
+        root = QtCore.QModelIndex()
+
+        rows, cols = self._shape
+        new_rows, new_cols = shape
+
+        # remove while the old array still backs the model, insert once the
+        # new one is in place, so the view never reads outside either array
+
+        if new_cols < cols:
+            self.beginRemoveColumns(root, new_cols, cols - 1)
+            self._shape = rows, new_cols
+            self.endRemoveColumns()
+            cols = new_cols
+
+        if new_rows < rows:
+            self.beginRemoveRows(root, new_rows, rows - 1)
+            self._shape = new_rows, cols
+            self.endRemoveRows()
+            rows = new_rows
+
+        self._array = array
+
+        if new_rows > rows:
+            self.beginInsertRows(root, rows, new_rows - 1)
+            self._shape = new_rows, cols
+            self.endInsertRows()
+            rows = new_rows
+
+        if new_cols > cols:
+            self.beginInsertColumns(root, cols, new_cols - 1)
+            self._shape = rows, new_cols
+            self.endInsertColumns()
+
+    def _emit_changed(self, changed):
+        changed_rows = np.flatnonzero(changed.any(axis=1))
+
+        if len(changed_rows) == 0:
+            return
+
+        if self._order is not None:
+            # rows are shown in a different order, update all of them
+            cols = np.flatnonzero(changed.any(axis=0))
+            self._invalidate(0, cols[0], self._shape[0] - 1, cols[-1])
+            self._emit_all_changed()
+            self._resort(cols[0], cols[-1])
+            return
+
+        changed_cols = np.flatnonzero(changed.any(axis=0))
+        ranges = self._heat_ranges(changed_cols[0], changed_cols[-1])
+
+        # emit one rectangle per run of consecutive changed rows
+
+        breaks = np.flatnonzero(np.diff(changed_rows) != 1) + 1
+
+        for run in np.split(changed_rows, breaks):
+            first_row, last_row = run[0], run[-1]
+            changed_cols = np.flatnonzero(
+                changed[first_row:last_row + 1].any(axis=0))
+            self._invalidate(first_row, changed_cols[0], last_row,
+                             changed_cols[-1])
+            top_left = self.index(first_row, changed_cols[0])
+            bottom_right = self.index(last_row, changed_cols[-1])
+            self.dataChanged.emit(top_left, bottom_right)
+
+        self._emit_heat_changed(ranges)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._shape[0]
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._shape[1]
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        if role == QtCore.Qt.EditRole:
+            row, col = self._source_row(index.row()), index.column()
+            return str(self._value(row, col))
+
+        if role == QtCore.Qt.DisplayRole or (
+                role == QtCore.Qt.BackgroundRole and self._heatmap):
+            row, col = self._source_row(index.row()), index.column()
+
+            tile_rows, tile_cols = self.tile_shape
+
+            texts, levels = self._text_tile(row // tile_rows,
+                                            col // tile_cols)
+
+            row %= tile_rows
+            col %= tile_cols
+
+            if role == QtCore.Qt.DisplayRole:
+                return texts[row, col]
+
+            level = levels[row, col]
+
+            return _HEAT_COLORS[level] if level >= 0 else None
+
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if not index.isValid() or role != QtCore.Qt.EditRole:
+            return False
+
+        row, col = index.row(), index.column()
+
+        dtype = self.dtype()
+
+        if self._fields:
+            dtype = dtype[self._fields[col]]
+
+        try:
+            if dtype.kind in 'biuf':
+                value = float(value)
+            elif dtype.kind == 'c':
+                value = complex(value)
+        except ValueError:
+            return False
+
+        ranges = self._heat_ranges(col, col)
+
+        self._write(row, col, row, col, value)
+
+        self.dataChanged.emit(index, index)
+        self._emit_heat_changed(ranges)
+        self.edited.emit()
+
+        self._resort(col, col)
+
+        return True
+
+    def set_block(self, row, col, block):
+        # write a 2-D block starting at (row, col) with a single edit. The
+        # block is clipped to the table
+
+        block = np.asarray(block)
+
+        if block.dtype.names:
+            block = self._field_columns(block, col)
+
+        if block.ndim < 2:
+            block = block.reshape(1, -1)
+
+        rows = min(block.shape[0], self._shape[0] - row)
+        cols = min(block.shape[1], self._shape[1] - col)
+
+        if rows <= 0 or cols <= 0:
+            return False
+
+        ranges = self._heat_ranges(col, col + cols - 1)
+
+        self._write(row, col, row + rows - 1, col + cols - 1,
+                    block[:rows, :cols])
+
+        self.dataChanged.emit(self.index(row, col),
+                              self.index(row + rows - 1, col + cols - 1))
+        self._emit_heat_changed(ranges)
+        self.edited.emit()
+
+        self._resort(col, col + cols - 1)
+
+        return True
+
+    def _field_columns(self, block, col):
+        # one column per field. Fields are matched by name if the table
+        # has the same fields at col
+
+        names = block.dtype.names
+        targets = self._fields[col:col + len(names)] if self._fields else ()
+
+        if targets and all(name in names for name in targets):
+            names = targets
+
+        block = block.reshape(-1)
+        columns = np.empty((len(block), len(names)), dtype=object)
+
+        for i, name in enumerate(names):
+            columns[:, i] = block[name]
+
+        return columns
+
+    def fill(self, ranges, value):
+        # ranges are (top, left, bottom, right) tuples, bounds included
+
+        heat_ranges = {}
+
+        for top, left, bottom, right in ranges:
+            heat_ranges = {**self._heat_ranges(left, right), **heat_ranges}
+            self._write(top, left, bottom, right, value)
+            self.dataChanged.emit(self.index(top, left),
+                                  self.index(bottom, right))
+
+        self._emit_heat_changed(heat_ranges)
+        self.edited.emit()
+
+        if ranges:
+            self._resort(min(r[1] for r in ranges), max(r[3] for r in ranges))
+
+    def flags(self, index):
+        flags = super(ArrayModel, self).flags(index)
+
+        if self.editable():
+            flags |= QtCore.Qt.ItemIsEditable
+
+        return flags
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole:
+            if orientation == QtCore.Qt.Horizontal and self._fields:
+                return self._fields[section]
+            if orientation == QtCore.Qt.Vertical:
+                return str(self._source_row(section))
+            return str(section)
+        return None
+
+
+class ArraySliceControls(QtWidgets.QWidget):
+    # selects the axes shown as rows and columns and the index along all
+    # other axes of an N-D array
+
+    def __init__(self, model):
+        super(ArraySliceControls, self).__init__()
+
+        self._model = model
+        self._row_combo = None
+        self._col_combo = None
+        self._spinboxes = []
+
+        layout = QtWidgets.QGridLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+
+        model.shape_changed.connect(self.rebuild)
+
+    def rebuild(self):
+        layout = self.layout()
+
+        while layout.count():
+            layout.takeAt(0).widget().deleteLater()
+
+        self._row_combo = None
+        self._col_combo = None
+        self._spinboxes = []
+
+        source = self._model.source()
+        shape = np.shape(source)
+        fields = _field_names(source)
+
+        if len(shape) <= (1 if fields else 2):
+            self.setVisible(False)
+            return
+
+        self.setVisible(True)
+
+        row_axis, col_axis, indices = self._model.slice()
+
+        labels = [f'Axis {axis} ({size})' for axis, size in enumerate(shape)]
+
+        self._row_combo = QtWidgets.QComboBox()
+        self._row_combo.addItems(labels)
+        self._row_combo.setCurrentIndex(row_axis)
+        self._row_combo.currentIndexChanged.connect(self._axes_changed)
+        layout.addWidget(QtWidgets.QLabel('Rows:'), 0, 0)
+        layout.addWidget(self._row_combo, 0, 1)
+
+        if not fields:
+            self._col_combo = QtWidgets.QComboBox()
+            self._col_combo.addItems(labels)
+            self._col_combo.setCurrentIndex(col_axis)
+            self._col_combo.currentIndexChanged.connect(self._axes_changed)
+            layout.addWidget(QtWidgets.QLabel('Columns:'), 1, 0)
+            layout.addWidget(self._col_combo, 1, 1)
+
+        for axis, size in enumerate(shape):
+            spinbox = QtWidgets.QSpinBox()
+            spinbox.setRange(0, max(size - 1, 0))
+            spinbox.setValue(indices.get(axis, 0))
+            spinbox.setEnabled(axis not in (row_axis, col_axis))
+            spinbox.valueChanged.connect(self._apply)
+            layout.addWidget(QtWidgets.QLabel(f'Axis {axis}:'), axis + 2, 0)
+            layout.addWidget(spinbox, axis + 2, 1)
+            self._spinboxes.append(spinbox)
+
+    def _axes_changed(self):
+        row_axis = self._row_combo.currentIndex()
+        col_axis = self._col_combo.currentIndex() if self._col_combo else None
+
+        if row_axis == col_axis:
+            # swap the axes instead of showing one axis twice
+            old_row_axis, old_col_axis, _ = self._model.slice()
+
+            if self.sender() is self._row_combo:
+                col_axis = old_row_axis
+            else:
+                row_axis = old_col_axis
+
+            for combo, axis in [(self._row_combo, row_axis),
+                                (self._col_combo, col_axis)]:
+                combo.blockSignals(True)
+                combo.setCurrentIndex(axis)
+                combo.blockSignals(False)
+
+        for axis, spinbox in enumerate(self._spinboxes):
+            spinbox.setEnabled(axis not in (row_axis, col_axis))
+
+        self._apply()
+
+    def _apply(self):
+        row_axis = self._row_combo.currentIndex()
+        col_axis = self._col_combo.currentIndex() if self._col_combo else None
+
+        indices = {axis: spinbox.value()
+                   for axis, spinbox in enumerate(self._spinboxes)
+                   if axis not in (row_axis, col_axis)}
+
+        self._model.set_slice(row_axis, col_axis, indices)
+
+
+def _parse_block(text, dtype):
+    delimiter = '\t' if '\t' in text else ',' if ',' in text else None
+
+    # copies of structured arrays start with a row of field names. The
+    # fields are returned by name so they can be pasted in any order
+
+    lines = text.splitlines()
+    names = None
+
+    if dtype.names and lines:
+        cells = [cell.strip() for cell in lines[0].split(delimiter)]
+        if all(cell in dtype.names for cell in cells):
+            names = cells
+            text = '\n'.join(lines[1:])
+
+    if names is not None:
+        fields = [(name, dtype[name]) for name in names]
+        if not text.strip():
+            return np.empty(0, dtype=fields)
+        block = np.loadtxt(io.StringIO(text), dtype=str,
+                           delimiter=delimiter, ndmin=2)
+        fields = np.empty(len(block), dtype=fields)
+        for i, name in enumerate(names):
+            fields[name] = block[:, i]
+        return fields
+
+    if dtype.kind in 'biuf':
+        dtype = float
+    elif dtype.kind != 'c':
+        dtype = str
+
+    return np.loadtxt(io.StringIO(text), dtype=dtype, delimiter=delimiter,
+                      ndmin=2)
+
+
+class ArrayView(QtWidgets.QTableView):
+    def _selected_ranges(self):
+        return [(r.top(), r.left(), r.bottom(), r.right())
+                for r in self.selectionModel().selection()]
+
+    def _selected_cells(self):
+        return sum((bottom - top + 1) * (right - left + 1)
+                   for top, left, bottom, right in self._selected_ranges())
+
+    def copy(self):
+        ranges = self._selected_ranges()
+
+        if not ranges:
+            return
+
+        top = min(r[0] for r in ranges)
+        left = min(r[1] for r in ranges)
+        bottom = max(r[2] for r in ranges)
+        right = max(r[3] for r in ranges)
+
+        copy_to_clipboard(self.model().block(top, left, bottom, right))
+
+    def paste(self):
+        if not self.model().editable():
+            return
+
+        model = self.model()
+        mime_data = QtWidgets.QApplication.clipboard().mimeData()
+
+        # prefer the raw array from another window over parsing text
+
+        try:
+            if mime_data.hasFormat(ARRAY_MIME_TYPE):
+                data = bytes(mime_data.data(ARRAY_MIME_TYPE))
+                block = np.load(io.BytesIO(data), allow_pickle=False)
+            else:
+                block = _parse_block(mime_data.text(), model.dtype())
+        except ValueError as e:
+            print(f'Paste failed: {e}', file=sys.stderr)
+            return
+
+        if block.size == 0:
+            return
+
+        if block.ndim > 2:
+            print(f'Paste failed: cannot paste a {block.ndim}-D array',
+                  file=sys.stderr)
+            return
+
+        ranges = self._selected_ranges()
+
+        if ranges:
+            row = min(r[0] for r in ranges)
+            col = min(r[1] for r in ranges)
+        else:
+            row, col = self.currentIndex().row(), self.currentIndex().column()
+
+        # values that do not fit the dtype are only detected on writing
+
+        try:
+            if block.size == 1 and self._selected_cells() > 1:
+                model.fill(ranges, block.flat[0])
+            else:
+                model.set_block(max(row, 0), max(col, 0), block)
+        except (ValueError, TypeError) as e:
+            print(f'Paste failed: {e}', file=sys.stderr)
+
+    def fill_selection(self):
+        if not self.model().editable() or not self._selected_ranges():
+            return
+
+        text, ok = QtWidgets.QInputDialog.getText(self, 'Fill Selection',
+                                                  'Value:')
+
+        if not ok:
+            return
+
+        try:
+            value = float(text)
+        except ValueError:
+            print(f'Invalid value "{text}"', file=sys.stderr)
+            return
+
+        try:
+            self.model().fill(self._selected_ranges(), value)
+        except (ValueError, TypeError) as e:
+            print(f'Fill failed: {e}', file=sys.stderr)
+
+    def keyPressEvent(self, event):
+        if event.matches(QtGui.QKeySequence.Copy):
+            self.copy()
+        elif event.matches(QtGui.QKeySequence.Paste):
+            self.paste()
+        else:
+            super(ArrayView, self).keyPressEvent(event)
+
+    def contextMenuEvent(self, event):
+        menu = QtWidgets.QMenu(self)
+        menu.addAction('Copy', self.copy)
+        if self.model().editable():
+            menu.addAction('Paste', self.paste)
+            menu.addAction('Fill Selection...', self.fill_selection)
+        menu.exec_(event.globalPos())
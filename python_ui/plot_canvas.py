@@ -0,0 +1,454 @@
+# PythonUI by Thomas Oberbichler
+# https://github.com/oberbichler/PythonUI
+
+from matplotlib.backends.backend_agg import RendererAgg
+from matplotlib.backends.backend_qt5agg import (FigureCanvasQTAgg,
+                                                NavigationToolbar2QT)
+from matplotlib.figure import Figure
+from PyQt5 import QtCore, QtWidgets
+from .python_ui import _print_task_error, profiler, run_task
+import numpy as np
+import time
+
+
+def _decimate_line(x, y, x0, x1, nb_columns):
+    # keep the neighbours just outside the view so the line leaves the axes
+
+    start = max(np.searchsorted(x, x0, 'left') - 1, 0)
+    stop = min(np.searchsorted(x, x1, 'right') + 1, len(x))
+
+    x = x[start:stop]
+    y = y[start:stop]
+
+    if len(x) <= 4 * nb_columns or x1 <= x0:
+        return x, y
+
+    # reduce every pixel column to its minimum and maximum
+
+    columns = np.floor((x - x0) * (nb_columns / (x1 - x0))).astype(np.int64)
+
+    starts = np.flatnonzero(np.diff(columns, prepend=columns[0] - 1))
+    ends = np.append(starts[1:], len(x)) - 1
+
+    x_decimated = np.empty(2 * len(starts))
+    x_decimated[0::2] = x[starts]
+    x_decimated[1::2] = x[ends]
+
+    y_decimated = np.empty(2 * len(starts), dtype=np.result_type(y, float))
+    y_decimated[0::2] = np.fmin.reduceat(y, starts)
+    y_decimated[1::2] = np.fmax.reduceat(y, starts)
+
+    return x_decimated, y_decimated
+
+
+def _decimate_points(x, y, xlim, ylim, nb_columns, nb_rows):
+    (x0, x1), (y0, y1) = xlim, ylim
+
+    inside = (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
+
+    x = x[inside]
+    y = y[inside]
+
+    if len(x) <= nb_columns * nb_rows or x1 <= x0 or y1 <= y0:
+        return x, y
+
+    # keep one point per occupied pixel
+
+    columns = np.minimum((x - x0) * (nb_columns / (x1 - x0)), nb_columns - 1)
+    rows = np.minimum((y - y0) * (nb_rows / (y1 - y0)), nb_rows - 1)
+
+    pixels = columns.astype(np.int64) * nb_rows + rows.astype(np.int64)
+
+    _, indices = np.unique(pixels, return_index=True)
+
+    return x[indices], y[indices]
+
+
+class _BackgroundCanvas(FigureCanvasQTAgg):
+    render_finished = QtCore.pyqtSignal()
+
+    def __init__(self, figure, threaded=False):
+        super(_BackgroundCanvas, self).__init__(figure)
+        self.threaded = threaded
+        self._render_task = None
+        self._stale = False
+        self._deferred_events = []
+
+    def rendering(self):
+        return self._render_task is not None
+
+    def discard_render(self):
+        if self._render_task is not None:
+            self._stale = True
+
+    def draw(self):
+        if not self.threaded:
+            super(_BackgroundCanvas, self).draw()
+            return
+
+        if self._render_task is not None:
+            self._stale = True
+            return
+
+        # render into a fresh buffer so the one on screen stays untouched
+
+        w, h = self.get_width_height(physical=True)
+        key = w, h, self.figure.dpi
+        renderer = RendererAgg(w, h, self.figure.dpi)
+
+        self._render_task = run_task(self._render, renderer, key,
+                                     on_result=self._rendered,
+                                     on_error=self._render_failed)
+
+    def _handle(self, handler, event):
+        if self._render_task is None:
+            handler(event)
+            return
+
+        # resizing, panning, zooming and toolbar shortcuts change the figure
+        # that is being rendered on a worker thread. Replay them afterwards,
+        # only the latest of several moves or resizes is needed
+
+        event = type(event)(event)
+
+        if (self._deferred_events and
+                self._deferred_events[-1][1].type() == event.type() and
+                event.type() in (QtCore.QEvent.Resize,
+                                 QtCore.QEvent.MouseMove)):
+            self._deferred_events.pop()
+
+        self._deferred_events.append((handler, event))
+
+    def _replay_events(self):
+        events = self._deferred_events
+        self._deferred_events = []
+
+        for handler, event in events:
+            handler(event)
+
+    def resizeEvent(self, event):
+        self._handle(super(_BackgroundCanvas, self).resizeEvent, event)
+
+    def mousePressEvent(self, event):
+        self._handle(super(_BackgroundCanvas, self).mousePressEvent, event)
+
+    def mouseDoubleClickEvent(self, event):
+        self._handle(super(_BackgroundCanvas, self).mouseDoubleClickEvent,
+                     event)
+
+    def mouseMoveEvent(self, event):
+        self._handle(super(_BackgroundCanvas, self).mouseMoveEvent, event)
+
+    def mouseReleaseEvent(self, event):
+        self._handle(super(_BackgroundCanvas, self).mouseReleaseEvent, event)
+
+    def wheelEvent(self, event):
+        self._handle(super(_BackgroundCanvas, self).wheelEvent, event)
+
+    def keyPressEvent(self, event):
+        self._handle(super(_BackgroundCanvas, self).keyPressEvent, event)
+
+    def keyReleaseEvent(self, event):
+        self._handle(super(_BackgroundCanvas, self).keyReleaseEvent, event)
+
+    def _render(self, renderer, key):
+        self.figure.draw(renderer)
+        return renderer, key
+
+    def _rendered(self, result):
+        self._render_task = None
+        self._replay_events()
+
+        if self._stale:
+            self._stale = False
+            self.render_finished.emit()
+            if not self.rendering():
+                self.draw()
+            return
+
+        # hand the finished buffer to the widget, paintEvent reads from it
+
+        self.renderer, self._lastKey = result
+        self.update()
+
+        self.render_finished.emit()
+
+    def _render_failed(self, error):
+        self._render_task = None
+        self._stale = False
+        self._replay_events()
+        _print_task_error(error)
+        self.render_finished.emit()
+
+
+class PlotCanvas(QtWidgets.QWidget):
+    max_fps = 30
+    threaded = False
+
+    def __init__(self, parent):
+        super(PlotCanvas, self).__init__()
+
+        layout = QtWidgets.QGridLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(0)
+        self.setLayout(layout)
+
+        figure = Figure()
+        canvas = _BackgroundCanvas(figure, self.threaded)
+        canvas.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(canvas, 1, 1, 1, 1)
+        self._canvas = canvas
+
+        toolbar = NavigationToolbar2QT(canvas, self)
+        layout.addWidget(toolbar, 2, 1, 1, 1)
+
+        plot = figure.add_subplot(111)
+        plot.set_aspect('equal')
+        self._plot = plot
+
+        self._artists = None
+        self._background = None
+        self._limits = None
+
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+        self._redraw_timer = QtCore.QTimer(self)
+        self._redraw_timer.setSingleShot(True)
+        self._redraw_timer.timeout.connect(self._scheduled_redraw)
+        self._redraw_full = False
+        self._redraw_deferred = False
+        self._last_redraw = 0
+
+        canvas.render_finished.connect(self._on_render_finished)
+
+        self._decimated = []
+        self._decimation_deferred = False
+
+        canvas.mpl_connect('resize_event', self._update_decimation)
+
+    def _incremental(self):
+        return type(self).update_plot is not PlotCanvas.update_plot
+
+    def request_redraw(self, *, full=False):
+        # mark the canvas dirty; requests arriving before the next frame are
+        # merged into a single redraw of the latest state
+
+        self._redraw_full = self._redraw_full or full
+
+        if self._redraw_timer.isActive():
+            return
+
+        elapsed = (time.monotonic() - self._last_redraw) * 1000
+        delay = max(0, 1000 / self.max_fps - elapsed)
+
+        self._redraw_timer.start(int(delay))
+
+    def _scheduled_redraw(self):
+        full = self._redraw_full
+        self._redraw_full = False
+        self.redraw(full=full)
+
+    @profiler.timed('PlotCanvas.redraw')
+    def redraw(self, *, full=False):
+        self._redraw_timer.stop()
+
+        if self._canvas.rendering():
+            # the figure is being rendered on a worker thread and must not
+            # change meanwhile, redraw once the outdated render is dropped
+            self._redraw_full = self._redraw_full or full
+            self._redraw_deferred = True
+            self._canvas.discard_render()
+            return
+
+        try:
+            self._redraw(full)
+        finally:
+            self._last_redraw = time.monotonic()
+
+    def _on_render_finished(self):
+        if self._decimation_deferred:
+            self._decimation_deferred = False
+            self._update_decimation()
+            self._canvas.draw_idle()
+
+        if not self._redraw_deferred:
+            return
+
+        full = self._redraw_full
+        self._redraw_full = False
+        self._redraw_deferred = False
+        self.redraw(full=full)
+
+    def _redraw(self, full):
+        if self._artists is not None and not full:
+            self._update_artists()
+            return
+
+        plot = self._plot
+
+        figure = plot.get_figure()
+
+        for ax in figure.axes[1:]:
+            figure.delaxes(ax)
+
+        figure.subplots_adjust()
+
+        plot.clear()
+
+        self._artists = None
+        self._background = None
+        self._decimated = []
+
+        if self._incremental():
+            artists = list(self.init_plot(plot) or [])
+
+            if not self.threaded:
+                for artist in artists:
+                    artist.set_animated(True)
+
+            self._artists = artists
+
+            self.update_plot(plot)
+        else:
+            self.plot(plot)
+
+        self._canvas.draw()
+
+    def _update_artists(self):
+        canvas = self._canvas
+        plot = self._plot
+
+        self.update_plot(plot)
+
+        if self.threaded:
+            canvas.draw()
+            return
+
+        # a cached background is only valid for the limits it was drawn with
+
+        if self._background is None or self._limits != self._get_limits():
+            canvas.draw()
+            return
+
+        canvas.restore_region(self._background)
+        self._draw_artists()
+        canvas.blit(plot.get_figure().bbox)
+
+    def _get_limits(self):
+        return self._plot.get_xlim(), self._plot.get_ylim()
+
+    def _draw_artists(self):
+        for artist in self._artists:
+            artist.axes.draw_artist(artist)
+
+    def _on_draw(self, event):
+        # called for every full draw, including resizing, panning and zooming
+
+        if self._artists is None or self.threaded:
+            return
+
+        self._background = self._canvas.copy_from_bbox(
+            self._plot.get_figure().bbox)
+        self._limits = self._get_limits()
+
+        self._draw_artists()
+
+    def _pixel_size(self):
+        bbox = self._plot.bbox
+        return max(int(bbox.width), 1), max(int(bbox.height), 1)
+
+    def _update_decimation(self, *args):
+        for update in self._decimated:
+            update()
+
+    def _decimation_changed(self, update):
+        # limits set by user code while a worker thread renders the figure
+        if self._canvas.rendering():
+            self._decimation_deferred = True
+        else:
+            update()
+
+    def ax_line(self, x, y, *args, **kwargs):
+        # x has to be sorted in ascending order
+
+        ax = self._plot
+
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y)
+
+        def decimate():
+            nb_columns, _ = self._pixel_size()
+            x0, x1 = sorted(ax.get_xlim())
+            return _decimate_line(x, y, x0, x1, nb_columns)
+
+        nb_columns, _ = self._pixel_size()
+
+        # fixed limits are kept when plotting, otherwise the axis will
+        # scale to the full data range
+
+        if len(x) > 0 and not ax.get_autoscalex_on():
+            data = decimate()
+        elif len(x) > 0:
+            data = _decimate_line(x, y, x[0], x[-1], nb_columns)
+        else:
+            data = x, y
+
+        line, = ax.plot(*data, *args, **kwargs)
+
+        def update():
+            line.set_data(*decimate())
+
+        self._decimated.append(update)
+        ax.callbacks.connect('xlim_changed',
+                             lambda ax: self._decimation_changed(update))
+
+        return line
+
+    def ax_scatter(self, x, y, *args, **kwargs):
+        ax = self._plot
+
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+
+        def decimate(xlim, ylim):
+            nb_columns, nb_rows = self._pixel_size()
+            points = _decimate_points(x, y, xlim, ylim, nb_columns, nb_rows)
+            return np.column_stack(points)
+
+        # fixed limits are kept when plotting, otherwise the axes will
+        # scale to the full data range
+
+        if len(x) > 0:
+            xlim = np.nanmin(x), np.nanmax(x)
+            ylim = np.nanmin(y), np.nanmax(y)
+            if not ax.get_autoscalex_on():
+                xlim = sorted(ax.get_xlim())
+            if not ax.get_autoscaley_on():
+                ylim = sorted(ax.get_ylim())
+            x_decimated, y_decimated = decimate(xlim, ylim).T
+        else:
+            x_decimated, y_decimated = x, y
+
+        collection = ax.scatter(x_decimated, y_decimated, *args, **kwargs)
+
+        def update():
+            xlim = sorted(ax.get_xlim())
+            ylim = sorted(ax.get_ylim())
+            collection.set_offsets(decimate(xlim, ylim))
+
+        self._decimated.append(update)
+        ax.callbacks.connect('xlim_changed',
+                             lambda ax: self._decimation_changed(update))
+        ax.callbacks.connect('ylim_changed',
+                             lambda ax: self._decimation_changed(update))
+
+        return collection
+
+    def plot(self, ax):
+        pass
+
+    def init_plot(self, ax):
+        pass
+
+    def update_plot(self, ax):
+        pass
@@ -1,13 +1,21 @@
 # PythonUI by Thomas Oberbichler
 # https://github.com/oberbichler/PythonUI
 
-from matplotlib.backends.backend_qt5agg import (FigureCanvasQTAgg,
-                                                NavigationToolbar2QT)
-from matplotlib.figure import Figure
-from PyQt5 import Qt, QtCore, QtGui, QtWidgets
+from PyQt5 import QtCore, QtGui, QtWidgets
+import collections
+import contextlib
+import functools
 import inspect
-import numpy as np
+import io
+import math
+import os
+import pickle
+import re
+import shutil
 import sys
+import threading
+import time
+import traceback
 
 
 class _GenericValidator(QtGui.QValidator):
@@ -47,196 +55,1698 @@ class NumberValidator(QtGui.QValidator):
         return str(self.default)
 
 
+class Profiler(object):
+    lag_interval = 50
+
+    def __init__(self):
+        self.enabled = False
+        self._stats = {}
+        self._lag_timer = None
+        self._lag_last = 0
+
+    def enable(self):
+        self.enabled = True
+
+        # event loop latency is measured as the drift of a periodic timer
+
+        if self._lag_timer is None:
+            self._lag_timer = QtCore.QTimer()
+            self._lag_timer.timeout.connect(self._measure_lag)
+
+        self._lag_last = time.perf_counter()
+        self._lag_timer.start(self.lag_interval)
+
+    def disable(self):
+        self.enabled = False
+
+        if self._lag_timer is not None:
+            self._lag_timer.stop()
+
+    def reset(self):
+        self._stats.clear()
+
+    def record(self, name, elapsed):
+        stats = self._stats.get(name)
+
+        if stats is None:
+            stats = self._stats[name] = [0, 0.0, 0.0]
+
+        stats[0] += 1
+        stats[1] += elapsed
+        stats[2] = max(stats[2], elapsed)
+
+    @contextlib.contextmanager
+    def measure(self, name):
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def wrap(self, name, action):
+        @functools.wraps(action)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return action(*args, **kwargs)
+
+            start = time.perf_counter()
+
+            try:
+                return action(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start)
+
+        return wrapper
+
+    def timed(self, name):
+        return lambda action: self.wrap(name, action)
+
+    def stats(self):
+        return {name: {'count': count, 'total': total, 'mean': total / count,
+                       'max': maximum}
+                for name, (count, total, maximum) in self._stats.items()}
+
+    def report(self):
+        lines = [f'{"":40s} {"calls":>8s} {"total ms":>10s} '
+                 f'{"mean ms":>10s} {"max ms":>10s}']
+
+        stats = sorted(self.stats().items(),
+                       key=lambda item: -item[1]['total'])
+
+        for name, item in stats:
+            lines.append(f'{name[:40]:40s} {item["count"]:8d} '
+                         f'{item["total"] * 1000:10.2f} '
+                         f'{item["mean"] * 1000:10.3f} '
+                         f'{item["max"] * 1000:10.3f}')
+
+        return '\n'.join(lines)
+
+    def _measure_lag(self):
+        now = time.perf_counter()
+        lag = now - self._lag_last - self.lag_interval / 1000
+        self._lag_last = now
+
+        self.record('event loop latency', max(lag, 0))
+
+
+profiler = Profiler()
+
+
+def _accepts_argument(action):
+    try:
+        parameters = inspect.signature(action).parameters.values()
+    except (TypeError, ValueError):
+        return True
+
+    return any(parameter.kind in (parameter.POSITIONAL_ONLY,
+                                  parameter.POSITIONAL_OR_KEYWORD,
+                                  parameter.VAR_POSITIONAL)
+               for parameter in parameters)
+
+
+def _values_equal(a, b):
+    # numpy is only imported by the user code that creates arrays
+    np = sys.modules.get('numpy')
+
+    if np and (isinstance(a, np.ndarray) or isinstance(b, np.ndarray)):
+        if not isinstance(a, np.ndarray) or not isinstance(b, np.ndarray):
+            return False
+        if a.shape != b.shape or a.dtype != b.dtype:
+            return False
+        try:
+            return np.array_equal(a, b, equal_nan=True)
+        except TypeError:
+            return np.array_equal(a, b)
+
+    try:
+        return bool(a == b)
+    except (TypeError, ValueError):
+        return False
+
+
 class Option(QtCore.QObject):
     _changed = QtCore.pyqtSignal(object)
 
-    def __init__(self, value, action=None):
-        super(Option, self).__init__()
-        self.value = value
+    _batch_depth = 0
+    _batch_pending = {}
+
+    _connection_scopes = []
+
+    def __init__(self, value, action=None, compare=False, debounce_ms=None,
+                 throttle_ms=None):
+        super(Option, self).__init__()
+
+        if debounce_ms and throttle_ms:
+            raise ValueError('Use either debounce_ms or throttle_ms')
+
+        self.compare = compare
+        self.debounce_ms = debounce_ms
+        self.throttle_ms = throttle_ms
+
+        self._timer = None
+        self._timer_pending = False
+
+        if debounce_ms or throttle_ms:
+            self._timer = QtCore.QTimer(self)
+            self._timer.setSingleShot(True)
+            self._timer.timeout.connect(self._timeout)
+
+        self._value = value
+        self._version = 0
+
+        if action:
+            self.connect(action)
+
+    @property
+    def version(self):
+        return self._version
+
+    @classmethod
+    @contextlib.contextmanager
+    def batch(cls):
+        # defer all emits until the outermost batch exits, then notify each
+        # changed option once with its final value
+
+        # the state lives on Option so subclasses and instances share it
+
+        Option._batch_depth += 1
+
+        try:
+            yield
+        finally:
+            Option._batch_depth -= 1
+
+            if Option._batch_depth == 0:
+                pending = list(Option._batch_pending)
+                Option._batch_pending.clear()
+
+                for option in pending:
+                    option._notify()
+
+    transaction = batch
+
+    @classmethod
+    @contextlib.contextmanager
+    def _track_connections(cls):
+        # record every connection made inside the block so the widgets that
+        # were built meanwhile can be detached from their options later
+
+        connections = []
+        cls._connection_scopes.append(connections)
+
+        try:
+            yield connections
+        finally:
+            cls._connection_scopes.remove(connections)
+
+    def connect(self, action):
+        # methods of QObjects stay unwrapped so Qt disconnects them when
+        # their object is deleted. The wrapper only measures callbacks while
+        # the profiler is enabled
+
+        receiver = getattr(action, '__self__', None)
+
+        if not isinstance(receiver, QtCore.QObject):
+            receiver = None
+            name = getattr(action, '__qualname__', type(action).__name__)
+
+            if not _accepts_argument(action):
+                action = (lambda action: lambda value: action())(action)
+
+            action = profiler.wrap(f'Option callback {name}', action)
+        elif not _accepts_argument(action):
+            # e.g. redraw(*, full=False) must not receive the value
+            action = (lambda action: lambda value: action())(action)
+        else:
+            receiver = None
+
+        connection = self._changed.connect(action)
+
+        if receiver is not None:
+            # the wrapper hides the receiver from Qt, disconnect it manually
+            receiver.destroyed.connect(lambda: self.disconnect(connection))
+
+        for connections in Option._connection_scopes:
+            connections.append((self, connection))
+
+        return connection
+
+    def disconnect(self, connection):
+        try:
+            self._changed.disconnect(connection)
+        except TypeError:
+            pass
+
+    def change(self, value):
+        self.value = value
+
+    def __call__(self):
+        return self.value
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        if (self.compare and hasattr(self, '_value') and
+                _values_equal(self._value, value)):
+            return
+
+        self._value = value
+        self.emit()
+
+    def emit(self):
+        self._version += 1
+        self._notify()
+
+    def _notify(self):
+        if Option._batch_depth > 0:
+            Option._batch_pending[self] = None
+        elif self.debounce_ms:
+            self._timer.start(self.debounce_ms)
+        elif self.throttle_ms:
+            if self._timer.isActive():
+                self._timer_pending = True
+            else:
+                self._emit_changed()
+                self._timer.start(self.throttle_ms)
+        else:
+            self._emit_changed()
+
+    def _timeout(self):
+        if self.debounce_ms:
+            self._emit_changed()
+        elif self._timer_pending:
+            self._timer_pending = False
+            self._emit_changed()
+            self._timer.start(self.throttle_ms)
+
+    @profiler.timed('Option.emit')
+    def _emit_changed(self):
+        self._changed.emit(self._value)
+
+
+class ComputedOption(Option):
+    _dirty = set()
+    _scheduled = False
+
+    def __init__(self, fn, deps, action=None, **kwargs):
+        super(ComputedOption, self).__init__(None, action, **kwargs)
+
+        self._fn = fn
+        self._deps = list(deps)
+        depths = [getattr(dep, '_depth', 0) for dep in self._deps]
+        self._depth = 1 + max(depths, default=0)
+        self._computed_versions = None
+        self._emitted_versions = None
+
+        for dep in self._deps:
+            dep.connect(self._invalidate)
+
+    @property
+    def version(self):
+        self._update()
+        return self._version
+
+    @property
+    def value(self):
+        self._update()
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        raise AttributeError('The value of a ComputedOption can not be set')
+
+    def emit(self):
+        self._notify()
+
+    def _update(self):
+        versions = tuple(dep.version for dep in self._deps)
+
+        if versions == self._computed_versions:
+            return
+
+        self._value = self._fn(*(dep.value for dep in self._deps))
+        self._computed_versions = versions
+        self._version += 1
+
+    def _refresh(self):
+        self._update()
+
+        if self._emitted_versions != self._computed_versions:
+            self._emitted_versions = self._computed_versions
+            self.emit()
+
+    def _invalidate(self, *args):
+        ComputedOption._dirty.add(self)
+
+        if not ComputedOption._scheduled:
+            ComputedOption._scheduled = True
+            QtCore.QTimer.singleShot(0, ComputedOption._flush)
+
+    @staticmethod
+    def _flush():
+        # refresh in topological order: an option is only handled after all
+        # of its dependencies, so it recomputes at most once per turn
+
+        ComputedOption._scheduled = False
+
+        dirty = ComputedOption._dirty
+
+        while dirty:
+            option = min(dirty, key=lambda option: option._depth)
+            dirty.discard(option)
+            option._refresh()
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class Task(QtCore.QObject):
+    progress = QtCore.pyqtSignal(object)
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(object)
+    done = QtCore.pyqtSignal()
+
+    def __init__(self, fn, args=(), process=False):
+        super(Task, self).__init__()
+        self._fn = fn
+        self._args = args
+        self._process = process
+        self._future = None
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+        if self._future is not None:
+            self._future.cancel()
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise TaskCancelled()
+
+    def report_progress(self, value):
+        self.progress.emit(value)
+
+    def _run(self):
+        try:
+            if self._process:
+                result = self._run_in_process()
+            else:
+                result = self._run_in_thread()
+        except Exception as e:
+            self.failed.emit(e)
+        else:
+            if self.cancelled:
+                self.failed.emit(TaskCancelled())
+            else:
+                self.finished.emit(result)
+
+        self.done.emit()
+
+    def _run_in_thread(self):
+        kwargs = {}
+
+        if 'task' in inspect.signature(self._fn).parameters:
+            kwargs['task'] = self
+
+        return self._fn(*self._args, **kwargs)
+
+    def _run_in_process(self):
+        import concurrent.futures
+
+        self.check_cancelled()
+
+        shared = []
+
+        try:
+            args = _share_arrays(self._args, shared)
+            self._future = _process_pool().submit(_call_in_process, self._fn,
+                                                  args)
+            result = self._future.result()
+        except concurrent.futures.CancelledError:
+            raise TaskCancelled()
+        finally:
+            for shm in shared:
+                shm.close()
+                shm.unlink()
+
+        return _unshare_arrays(result, copy=True)
+
+
+class _TaskRunnable(QtCore.QRunnable):
+    def __init__(self, task):
+        super(_TaskRunnable, self).__init__()
+        self._task = task
+
+    def run(self):
+        self._task._run()
+
+
+_running_tasks = set()
+
+_process_pool_executor = None
+
+SHARED_MEMORY_THRESHOLD = 1 << 20
+
+
+def _process_pool(max_workers=None):
+    global _process_pool_executor
+
+    if _process_pool_executor is None:
+        import concurrent.futures
+        import multiprocessing
+
+        # spawn instead of fork: forking a process that runs Qt threads is
+        # not safe
+        context = multiprocessing.get_context('spawn')
+        _process_pool_executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers, mp_context=context)
+
+    return _process_pool_executor
+
+
+def _shutdown_process_pool():
+    global _process_pool_executor
+
+    if _process_pool_executor is not None:
+        _process_pool_executor.shutdown(cancel_futures=True)
+        _process_pool_executor = None
+
+
+class _SharedArray(object):
+    def __init__(self, name, shape, dtype):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+
+def _share_arrays(value, shared):
+    # replace large arrays by handles to shared memory so they are not
+    # pickled through the pipe to or from the worker processes
+
+    from multiprocessing import shared_memory
+    import numpy as np
+
+    if isinstance(value, tuple):
+        return tuple(_share_arrays(item, shared) for item in value)
+    if isinstance(value, list):
+        return [_share_arrays(item, shared) for item in value]
+    if isinstance(value, dict):
+        return {key: _share_arrays(item, shared)
+                for key, item in value.items()}
+
+    if (not isinstance(value, np.ndarray) or value.dtype.hasobject or
+            value.nbytes < SHARED_MEMORY_THRESHOLD):
+        return value
+
+    shm = shared_memory.SharedMemory(create=True, size=value.nbytes)
+    shared.append(shm)
+
+    np.ndarray(value.shape, value.dtype, buffer=shm.buf)[...] = value
+
+    return _SharedArray(shm.name, value.shape, value.dtype.str)
+
+
+def _unshare_arrays(value, attached=None, copy=False):
+    if isinstance(value, tuple):
+        return tuple(_unshare_arrays(item, attached, copy) for item in value)
+    if isinstance(value, list):
+        return [_unshare_arrays(item, attached, copy) for item in value]
+    if isinstance(value, dict):
+        return {key: _unshare_arrays(item, attached, copy)
+                for key, item in value.items()}
+
+    if not isinstance(value, _SharedArray):
+        return value
+
+    from multiprocessing import shared_memory
+    import numpy as np
+
+    shm = shared_memory.SharedMemory(name=value.name)
+
+    array = np.ndarray(value.shape, value.dtype, buffer=shm.buf)
+
+    if copy:
+        array = array.copy()
+        shm.close()
+        shm.unlink()
+    else:
+        attached.append(shm)
+
+    return array
+
+
+def _call_in_process(fn, args):
+    attached = []
+
+    try:
+        result = fn(*_unshare_arrays(args, attached))
+
+        shared = []
+        result = _share_arrays(result, shared)
+
+        # the parent process unlinks these after copying the data out
+        for shm in shared:
+            shm.close()
+
+        return result
+    finally:
+        for shm in attached:
+            try:
+                shm.close()
+            except BufferError:
+                pass
+
+
+def _print_task_error(error):
+    if isinstance(error, TaskCancelled):
+        return
+    traceback.print_exception(type(error), error, error.__traceback__)
+
+
+def run_task(fn, *args, result=None, progress=None, on_result=None,
+             on_error=None, redraw=None, process=False):
+    task = Task(fn, args, process)
+
+    if result is not None:
+        task.finished.connect(result.change)
+    if progress is not None:
+        task.progress.connect(progress.change)
+    if on_result is not None:
+        task.finished.connect(on_result)
+    if redraw is not None:
+        task.finished.connect(lambda _: redraw.request_redraw())
+
+    task.failed.connect(on_error or _print_task_error)
+
+    # keep the task alive until its queued signals have been delivered
+    _running_tasks.add(task)
+    task.done.connect(lambda: _running_tasks.discard(task))
+
+    QtCore.QThreadPool.globalInstance().start(_TaskRunnable(task))
+
+    return task
+
+
+class Fore(object):
+    BLACK = '\033[30m'
+    RED = '\033[31m'
+    GREEN = '\033[32m'
+    YELLOW = '\033[33m'
+    BLUE = '\033[34m'
+    MAGENTA = '\033[35m'
+    CYAN = '\033[36m'
+    WHITE = '\033[37m'
+    RESET = '\033[39m'
+
+
+class Back(object):
+    BLACK = '\033[40m'
+    RED = '\033[41m'
+    GREEN = '\033[42m'
+    YELLOW = '\033[43m'
+    BLUE = '\033[44m'
+    MAGENTA = '\033[45m'
+    CYAN = '\033[46m'
+    WHITE = '\033[47m'
+    RESET = '\033[49m'
+
+
+class Style(object):
+    DIM = '\033[2m'
+    NORMAL = '\033[22m'
+    BRIGHT = '\033[1m'
+    RESET_ALL = '\033[0m'
+
+
+ConsoleStyles = Fore, Back, Style
+
+
+class DarkStyle:
+    BACKGROUND = QtGui.QColor('#1b1b1b')
+    BLACK = QtGui.QColor('#303030')
+    RED = QtGui.QColor('#e1321a')
+    GREEN = QtGui.QColor('#6ab017')
+    YELLOW = QtGui.QColor('#ffc005')
+    BLUE = QtGui.QColor('#004f9e')
+    MAGENTA = QtGui.QColor('#ec0048')
+    CYAN = QtGui.QColor('#2aa7e7')
+    WHITE = QtGui.QColor('#f2f2f2')
+
+
+class _ConsoleBuffer(object):
+    # Buffering, escape sequence parsing and trimming shared by Console and
+    # LogConsole. Subclasses store the text and implement _append, _trim,
+    # _insert_text, _move_cursor and toPlainText
+
+    def _init_buffer(self, flush_interval, max_latency, max_lines, max_bytes,
+                     history_file):
+        self.flush_interval = flush_interval
+        self.max_latency = max_latency
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self.history_file = history_file
+
+        # lines trimmed in an earlier session do not belong to this log
+
+        if history_file:
+            open(history_file, 'w', encoding='utf-8').close()
+
+        self._pending = []
+        self._partial = ''
+        self._last_flush = 0
+
+        # (foreground, background, bold) of the text written next. Colors
+        # are palette indices or rgb tuples, None is the default color
+
+        self._state = _DEFAULT_STATE
+
+        self._flush_timer = QtCore.QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.timeout.connect(self.flush)
+
+    @profiler.timed('Console.write')
+    def write(self, text):
+        if not text:
+            return
+
+        self._pending.append(text)
+
+        # show output right away when the console has been quiet for a
+        # while, otherwise coalesce it into the next timed flush
+
+        elapsed = (time.monotonic() - self._last_flush) * 1000
+
+        if elapsed >= self.max_latency:
+            self.flush()
+        elif not self._flush_timer.isActive():
+            self._flush_timer.start(self.flush_interval)
+
+    @profiler.timed('Console.flush')
+    def flush(self):
+        self._flush_timer.stop()
+
+        if not self._pending:
+            return
+
+        text = self._partial + ''.join(self._pending)
+        self._pending = []
+
+        self._append(text)
+
+        self._last_flush = time.monotonic()
+
+    def _spill(self, text):
+        with open(self.history_file, 'a', encoding='utf-8') as f:
+            f.write(text)
+
+    def save_log(self, path):
+        self.flush()
+
+        with open(path, 'w', encoding='utf-8') as f:
+            if self.history_file and os.path.exists(self.history_file):
+                with open(self.history_file, encoding='utf-8') as history:
+                    shutil.copyfileobj(history, f)
+            f.write(self.toPlainText())
+
+    def _insert(self, text):
+        # returns an incomplete escape sequence at the end of the text. It
+        # is completed by the next write
+
+        npos = 0
+
+        for match in _ESCAPE_PATTERN.finditer(text):
+            start = match.start()
+
+            if start != npos:
+                self._insert_text(text[npos:start])
+
+            npos = match.end()
+
+            params, command = match.groups()
+
+            if command is None:
+                # keep a truncated sequence, drop a malformed one
+                if npos == len(text):
+                    return text[start:]
+                continue
+
+            if command == 'm':
+                self._state = _select_graphic_rendition(self._state, params)
+            elif command in _CURSOR_COMMANDS:
+                self._move_cursor(command, params)
+
+        if npos != len(text):
+            self._insert_text(text[npos:])
+
+        return ''
+
+
+class Console(_ConsoleBuffer, QtWidgets.QTextEdit):
+
+    def __init__(self, flush_interval=25, max_latency=50, max_lines=None,
+                 max_bytes=None, history_file=None):
+        super(Console, self).__init__()
+
+        self._init_buffer(flush_interval, max_latency, max_lines, max_bytes,
+                          history_file)
+        
+        font = QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont)
+        
+        self.style = DarkStyle
+
+        font = QtGui.QFont('Consolas')
+        font.setStyleHint(QtGui.QFont.TypeWriter)
+        self.setFont(font)
+        self.setReadOnly(True)
+        self.setFrameStyle(QtWidgets.QFrame.NoFrame)
+        self.setLineWrapMode(QtWidgets.QTextEdit.NoWrap)
+
+        p = self.palette()
+        p.setColor(QtGui.QPalette.Base, self.style.BACKGROUND)
+        p.setColor(QtGui.QPalette.Text, self.style.WHITE)
+        self.setPalette(p)
+
+        self.setUndoRedoEnabled(False)
+
+        self._formats = {}
+
+        self._cursor = QtGui.QTextCursor(self.document())
+
+    def _append(self, text):
+        cursor = self._cursor
+
+        cursor.beginEditBlock()
+        self._partial = self._insert(text)
+        self._trim()
+        cursor.endEditBlock()
+
+        self.setTextCursor(cursor)
+        self.ensureCursorVisible()
+
+    def _trim(self):
+        if not self.max_lines and not self.max_bytes:
+            return
+
+        document = self.document()
+
+        nb_blocks = document.blockCount()
+        size = document.characterCount()
+
+        def exceeded():
+            if self.max_lines and nb_blocks - nb_removed > self.max_lines:
+                return True
+            if self.max_bytes and size > self.max_bytes:
+                return True
+            return False
+
+        block = document.begin()
+        nb_removed = 0
+
+        while block != document.lastBlock() and exceeded():
+            size -= block.length()
+            nb_removed += 1
+            block = block.next()
+
+        if nb_removed == 0:
+            return
+
+        cursor = QtGui.QTextCursor(document)
+        cursor.setPosition(block.position(), QtGui.QTextCursor.KeepAnchor)
+
+        if self.history_file:
+            self._spill(cursor.selection().toPlainText())
+
+        cursor.removeSelectedText()
+
+    def _insert_text(self, text):
+        cursor = self._cursor
+        text_format = self._format(self._state)
+
+        if '\r' in text:
+            text = text.replace('\r\n', '\n')
+        elif cursor.atEnd():
+            cursor.insertText(text, text_format)
+            return
+
+        # the cursor was moved back into existing text or the text returns
+        # to the start of the line, overwrite it like a terminal does
+
+        for i, line in enumerate(text.split('\n')):
+            if i > 0:
+                if not cursor.movePosition(QtGui.QTextCursor.NextBlock):
+                    cursor.movePosition(QtGui.QTextCursor.EndOfBlock)
+                    cursor.insertBlock()
+
+            if '\r' in line:
+                # progress output rewrites the line many times per write.
+                # Merge the rewrites first so the line is only edited once
+
+                line, *rewrites = line.split('\r')
+
+                _overwrite(cursor, line, text_format)
+                cursor.movePosition(QtGui.QTextCursor.StartOfBlock)
+
+                line = ''
+                for rewrite in rewrites:
+                    line = rewrite + line[len(rewrite):]
+
+            _overwrite(cursor, line, text_format)
+
+    def _move_cursor(self, command, params):
+        cursor = self._cursor
+        n = _parse_codes(params)[0]
+
+        if command == 'K':
+            # erase in line: 0 to the end, 1 to the start, 2 entire line
+            if n == 0:
+                cursor.movePosition(QtGui.QTextCursor.EndOfBlock,
+                                    QtGui.QTextCursor.KeepAnchor)
+                cursor.removeSelectedText()
+            elif n == 1:
+                column = cursor.positionInBlock()
+                cursor.movePosition(QtGui.QTextCursor.StartOfBlock,
+                                    QtGui.QTextCursor.KeepAnchor)
+                cursor.insertText(' ' * column, self._format(self._state))
+            elif n == 2:
+                cursor.movePosition(QtGui.QTextCursor.StartOfBlock)
+                cursor.movePosition(QtGui.QTextCursor.EndOfBlock,
+                                    QtGui.QTextCursor.KeepAnchor)
+                cursor.removeSelectedText()
+            return
+
+        n = max(n, 1)
+        column = cursor.positionInBlock()
+
+        if command == 'A':
+            cursor.movePosition(QtGui.QTextCursor.PreviousBlock, n=n)
+        elif command == 'B':
+            cursor.movePosition(QtGui.QTextCursor.NextBlock, n=n)
+        elif command == 'C':
+            column += n
+        elif command == 'D':
+            column = max(column - n, 0)
+        elif command == 'G':
+            column = n - 1
+
+        # move to the column in the current line, padding it with spaces
+        # if it is too short
+
+        cursor.movePosition(QtGui.QTextCursor.StartOfBlock)
+        length = cursor.block().length() - 1
+
+        if column > length:
+            cursor.movePosition(QtGui.QTextCursor.EndOfBlock)
+            cursor.insertText(' ' * (column - length))
+        else:
+            cursor.movePosition(QtGui.QTextCursor.Right, n=column)
+
+    def _format(self, state):
+        text_format = self._formats.get(state)
+
+        if text_format is not None:
+            return text_format
+
+        # truecolor output may produce many states, keep the cache bounded
+
+        if len(self._formats) >= 1024:
+            self._formats.clear()
+
+        foreground, background, bold = state
+
+        text_format = QtGui.QTextCharFormat()
+
+        if foreground is not None:
+            text_format.setForeground(_ansi_color(self.style, foreground))
+        if background is not None:
+            text_format.setBackground(_ansi_color(self.style, background))
+        if bold:
+            text_format.setFontWeight(QtGui.QFont.Bold)
+
+        self._formats[state] = text_format
+
+        return text_format
+
+
+class LogConsole(_ConsoleBuffer, QtWidgets.QAbstractScrollArea):
+    # Console for very long logs. Lines are kept as plain strings and only
+    # the visible lines are painted. Styled lines store a list of
+    # (column, state) runs, plain lines store None
+
+    def __init__(self, flush_interval=25, max_latency=50, max_lines=None,
+                 max_bytes=None, history_file=None):
+        super(LogConsole, self).__init__()
+
+        self._init_buffer(flush_interval, max_latency, max_lines, max_bytes,
+                          history_file)
+
+        self.style = DarkStyle
+
+        font = QtGui.QFont('Consolas')
+        font.setStyleHint(QtGui.QFont.TypeWriter)
+        self.setFont(font)
+        self.setFrameStyle(QtWidgets.QFrame.NoFrame)
+        self.setFocusPolicy(QtCore.Qt.StrongFocus)
+
+        self._bold_font = QtGui.QFont(font)
+        self._bold_font.setWeight(QtGui.QFont.Bold)
+
+        p = self.viewport().palette()
+        p.setColor(QtGui.QPalette.Base, self.style.BACKGROUND)
+        p.setColor(QtGui.QPalette.Text, self.style.WHITE)
+        self.viewport().setPalette(p)
+
+        self._lines = ['']
+        self._runs = [None]
+        self._nb_chars = 0
+        self._width = 0
+
+        self._row = 0
+        self._column = 0
+
+        self._anchor = None
+        self._position = None
+
+    def _append(self, text):
+        scrollbar = self.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum()
+
+        self._partial = self._insert(text)
+        self._trim()
+
+        self._update_scrollbars()
+
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+        self.viewport().update()
+
+    def clear(self):
+        self._lines = ['']
+        self._runs = [None]
+        self._nb_chars = 0
+        self._width = 0
+        self._row = 0
+        self._column = 0
+        self._anchor = None
+        self._position = None
+
+        self._update_scrollbars()
+        self.viewport().update()
+
+    def toPlainText(self):
+        return '\n'.join(self._lines)
+
+    def _trim(self):
+        nb_removed = 0
+
+        if self.max_lines and len(self._lines) > self.max_lines:
+            nb_removed = len(self._lines) - self.max_lines
+
+        size = self._nb_chars - sum(len(line) + 1
+                                    for line in self._lines[:nb_removed])
+
+        if self.max_bytes:
+            while nb_removed < len(self._lines) - 1 and size > self.max_bytes:
+                size -= len(self._lines[nb_removed]) + 1
+                nb_removed += 1
+
+        if nb_removed == 0:
+            return
+
+        if self.history_file:
+            self._spill(''.join(line + '\n'
+                                for line in self._lines[:nb_removed]))
+
+        del self._lines[:nb_removed]
+        del self._runs[:nb_removed]
+
+        self._nb_chars = size
+
+        if self._row < nb_removed:
+            self._column = 0
+        self._row = max(self._row - nb_removed, 0)
+
+        if self._anchor is not None:
+            self._anchor = self._shift(self._anchor, nb_removed)
+            self._position = self._shift(self._position, nb_removed)
+
+        scrollbar = self.verticalScrollBar()
+        scrollbar.setValue(scrollbar.value() - nb_removed)
+
+    def _shift(self, location, nb_removed):
+        row, column = location
+        if row < nb_removed:
+            return 0, 0
+        return row - nb_removed, column
+
+    # --- text store
+
+    def _insert_text(self, text):
+        if '\r' in text:
+            text = text.replace('\r\n', '\n')
+
+        lines = text.split('\n')
+
+        if (len(lines) > 1 and '\r' not in text and
+                self._state == _DEFAULT_STATE and
+                self._row == len(self._lines) - 1):
+            # appending plain lines at the end, the common case
+            self._put(lines[0])
+            self._lines.extend(lines[1:])
+            self._runs.extend([None] * (len(lines) - 1))
+            self._nb_chars += sum(map(len, lines[1:])) + len(lines) - 1
+            self._width = max(self._width, max(map(len, lines[1:])))
+            self._row = len(self._lines) - 1
+            self._column = len(lines[-1])
+            return
+
+        for i, line in enumerate(lines):
+            if i > 0:
+                self._newline()
+
+            if '\r' in line:
+                line, *rewrites = line.split('\r')
+
+                self._put(line)
+                self._column = 0
+
+                line = ''
+                for rewrite in rewrites:
+                    line = rewrite + line[len(rewrite):]
+
+            self._put(line)
+
+    def _newline(self):
+        self._row += 1
+        self._column = 0
+
+        if self._row == len(self._lines):
+            self._lines.append('')
+            self._runs.append(None)
+            self._nb_chars += 1
+
+    def _put(self, text):
+        if not text:
+            return
+
+        row = self._row
+        start = self._column
+        end = start + len(text)
+
+        line = self._lines[row]
+
+        if start > len(line):
+            line += ' ' * (start - len(line))
+
+        new_line = line[:start] + text + line[end:]
+
+        self._nb_chars += len(new_line) - len(self._lines[row])
+        self._lines[row] = new_line
+        self._width = max(self._width, len(new_line))
+
+        runs = self._runs[row]
+        state = self._state
+
+        if runs is None and state == _DEFAULT_STATE:
+            pass
+        elif start >= len(line) and runs is not None:
+            # appending to the line only needs a new run
+            if runs[-1][1] != state:
+                runs.append((start, state))
+        else:
+            self._runs[row] = _splice_runs(runs, start, end, state)
+
+        self._column = end
+
+    def _move_cursor(self, command, params):
+        n = _parse_codes(params)[0]
+
+        row = self._row
+        line = self._lines[row]
+        column = min(self._column, len(line))
+
+        if command == 'K':
+            if n == 0:
+                self._set_line(row, line[:column])
+            elif n == 1:
+                self._column = 0
+                self._put(' ' * column)
+            elif n == 2:
+                self._set_line(row, '')
+                self._column = 0
+            return
+
+        n = max(n, 1)
+
+        if command == 'A':
+            self._row = max(row - n, 0)
+        elif command == 'B':
+            self._row = min(row + n, len(self._lines) - 1)
+        elif command == 'C':
+            self._column += n
+        elif command == 'D':
+            self._column = max(self._column - n, 0)
+        elif command == 'G':
+            self._column = n - 1
+
+    def _set_line(self, row, line):
+        self._nb_chars += len(line) - len(self._lines[row])
+        self._lines[row] = line
+
+        runs = self._runs[row]
+
+        if runs is not None:
+            runs = [run for run in runs if run[0] < len(line)]
+            self._runs[row] = runs or None
+
+    # --- view
+
+    def _metrics(self):
+        metrics = self.fontMetrics()
+        return metrics.lineSpacing(), metrics.horizontalAdvance('x')
+
+    def _update_scrollbars(self):
+        line_height, char_width = self._metrics()
+
+        nb_visible = max(self.viewport().height() // line_height, 1)
+
+        scrollbar = self.verticalScrollBar()
+        scrollbar.setRange(0, max(len(self._lines) - nb_visible, 0))
+        scrollbar.setPageStep(nb_visible)
+
+        scrollbar = self.horizontalScrollBar()
+        scrollbar.setRange(0, max(self._width * char_width -
+                                  self.viewport().width(), 0))
+        scrollbar.setPageStep(self.viewport().width())
+        scrollbar.setSingleStep(char_width)
+
+    def resizeEvent(self, event):
+        super(LogConsole, self).resizeEvent(event)
+        self._update_scrollbars()
+
+    def paintEvent(self, event):
+        line_height, char_width = self._metrics()
+
+        painter = QtGui.QPainter(self.viewport())
+
+        ascent = self.fontMetrics().ascent()
+        first = self.verticalScrollBar().value()
+        nb_visible = self.viewport().height() // line_height + 2
+        offset = -self.horizontalScrollBar().value()
+
+        selection = self._selection()
+        highlight = self.palette().color(QtGui.QPalette.Highlight)
+        default_color = self.style.WHITE
+
+        last = min(first + nb_visible, len(self._lines))
+
+        for i, row in enumerate(range(first, last)):
+            y = i * line_height
+            line = self._lines[row]
+
+            if selection is not None and selection[0][0] <= row:
+                (start_row, start), (end_row, end) = selection
+
+                if row <= end_row:
+                    if row != start_row:
+                        start = 0
+                    if row != end_row:
+                        end = len(line) + 1
+
+                    painter.fillRect(offset + start * char_width, y,
+                                     (end - start) * char_width,
+                                     line_height, highlight)
+
+            runs = self._runs[row] or [(0, _DEFAULT_STATE)]
+
+            for j, (column, state) in enumerate(runs):
+                end = runs[j + 1][0] if j + 1 < len(runs) else len(line)
+                text = line[column:end]
+
+                if not text:
+                    continue
+
+                foreground, background, bold = state
+
+                x = offset + column * char_width
+
+                if background is not None:
+                    painter.fillRect(x, y, len(text) * char_width,
+                                     line_height,
+                                     _ansi_color(self.style, background))
+
+                if foreground is None:
+                    painter.setPen(default_color)
+                else:
+                    painter.setPen(_ansi_color(self.style, foreground))
+
+                painter.setFont(self._bold_font if bold else self.font())
+                painter.drawText(x, y + ascent, text)
+
+    # --- selection, copy and search
+
+    def _selection(self):
+        if self._anchor is None or self._anchor == self._position:
+            return None
+        return tuple(sorted([self._anchor, self._position]))
+
+    def _location(self, pos):
+        line_height, char_width = self._metrics()
+
+        row = self.verticalScrollBar().value() + pos.y() // line_height
+        row = min(max(row, 0), len(self._lines) - 1)
+
+        x = pos.x() + self.horizontalScrollBar().value()
+        column = min(max(round(x / char_width), 0), len(self._lines[row]))
+
+        return row, column
+
+    def mousePressEvent(self, event):
+        if event.button() == QtCore.Qt.LeftButton:
+            self._anchor = self._position = self._location(event.pos())
+            self.viewport().update()
+        super(LogConsole, self).mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & QtCore.Qt.LeftButton:
+            self._position = self._location(event.pos())
+            self.viewport().update()
+
+    def keyPressEvent(self, event):
+        if event.matches(QtGui.QKeySequence.Copy):
+            self.copy()
+        elif event.matches(QtGui.QKeySequence.SelectAll):
+            self.selectAll()
+        else:
+            super(LogConsole, self).keyPressEvent(event)
+
+    def contextMenuEvent(self, event):
+        menu = QtWidgets.QMenu(self)
+        copy_action = menu.addAction('Copy', self.copy)
+        copy_action.setEnabled(self._selection() is not None)
+        menu.addAction('Select All', self.selectAll)
+        menu.exec_(event.globalPos())
+
+    def selectAll(self):
+        self._anchor = 0, 0
+        self._position = len(self._lines) - 1, len(self._lines[-1])
+        self.viewport().update()
+
+    def selectedText(self):
+        selection = self._selection()
+
+        if selection is None:
+            return ''
+
+        (start_row, start), (end_row, end) = selection
+
+        if start_row == end_row:
+            return self._lines[start_row][start:end]
+
+        lines = self._lines[start_row:end_row + 1]
+        lines[0] = lines[0][start:]
+        lines[-1] = lines[-1][:end]
+
+        return '\n'.join(lines)
+
+    def copy(self):
+        text = self.selectedText()
+
+        if text:
+            QtWidgets.QApplication.clipboard().setText(text)
+
+    def find(self, text, backward=False, case_sensitive=False):
+        if not text:
+            return False
+
+        if not case_sensitive:
+            text = text.lower()
+
+        selection = self._selection()
+
+        if selection is None:
+            row, column = (len(self._lines) - 1, None) if backward else (0, 0)
+        elif backward:
+            row, column = selection[0]
+        else:
+            row, column = selection[1]
+
+        rows = range(row, -1, -1) if backward else range(row, len(self._lines))
+
+        for row in rows:
+            line = self._lines[row]
+
+            if not case_sensitive:
+                line = line.lower()
+
+            if backward:
+                index = line.rfind(text, 0, column)
+            else:
+                index = line.find(text, column)
 
-        if action:
-            self.connect(action)
+            column = None if backward else 0
 
-    def connect(self, action):
-        self._changed.connect(action)
+            if index < 0:
+                continue
 
-    def change(self, value):
-        self.value = value
+            self._anchor = row, index
+            self._position = row, index + len(text)
+            self._ensure_visible(row, index)
+            self.viewport().update()
 
-    def __call__(self):
-        return self.value
+            return True
 
-    @property
-    def value(self):
-        return self._value
+        return False
 
-    @value.setter
-    def value(self, value):
-        self._value = value
-        self.emit()
+    def _ensure_visible(self, row, column):
+        line_height, char_width = self._metrics()
 
-    def emit(self):
-        self._changed.emit(self._value)
+        scrollbar = self.verticalScrollBar()
+        top = scrollbar.value()
 
+        if not top <= row < top + scrollbar.pageStep():
+            scrollbar.setValue(row - scrollbar.pageStep() // 2)
 
-class Fore(object):
-    BLACK = '\033[30m'
-    RED = '\033[31m'
-    GREEN = '\033[32m'
-    YELLOW = '\033[33m'
-    BLUE = '\033[34m'
-    MAGENTA = '\033[35m'
-    CYAN = '\033[36m'
-    WHITE = '\033[37m'
-    RESET = '\033[39m'
+        scrollbar = self.horizontalScrollBar()
+        left = scrollbar.value()
+        width = self.viewport().width()
+        x = column * char_width
 
+        if not left <= x < left + width:
+            scrollbar.setValue(x - width // 2)
 
-class Back(object):
-    BLACK = '\033[40m'
-    RED = '\033[41m'
-    GREEN = '\033[42m'
-    YELLOW = '\033[43m'
-    BLUE = '\033[44m'
-    MAGENTA = '\033[45m'
-    CYAN = '\033[46m'
-    WHITE = '\033[47m'
-    RESET = '\033[49m'
 
+# CSI sequences 'ESC [ params intermediates final'. A sequence without its
+# final byte is either truncated (at the end of a write) or malformed
 
-class Style(object):
-    DIM = '\033[2m'
-    NORMAL = '\033[22m'
-    BRIGHT = '\033[1m'
-    RESET_ALL = '\033[0m'
+_ESCAPE_PATTERN = re.compile(r'\x1b(?:\[([0-?]*)[ -/]*([@-~])?)?')
 
+_CURSOR_COMMANDS = frozenset('ABCDGK')
 
-ConsoleStyles = Fore, Back, Style
 
+_DEFAULT_STATE = None, None, False
 
-class DarkStyle:
-    BACKGROUND = QtGui.QColor('#1b1b1b')
-    BLACK = QtGui.QColor('#303030')
-    RED = QtGui.QColor('#e1321a')
-    GREEN = QtGui.QColor('#6ab017')
-    YELLOW = QtGui.QColor('#ffc005')
-    BLUE = QtGui.QColor('#004f9e')
-    MAGENTA = QtGui.QColor('#ec0048')
-    CYAN = QtGui.QColor('#2aa7e7')
-    WHITE = QtGui.QColor('#f2f2f2')
 
+def _splice_runs(runs, start, end, state):
+    # style runs of a line after writing columns start to end with state
 
-class Console(QtWidgets.QTextEdit):
+    runs = runs or [(0, _DEFAULT_STATE)]
 
-    def __init__(self):
-        super(Console, self).__init__()
-        
-        font = QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont)
-        
-        self.style = DarkStyle
+    after = _DEFAULT_STATE
 
-        font = QtGui.QFont('Consolas')
-        font.setStyleHint(QtGui.QFont.TypeWriter)
-        self.setFont(font)
-        self.setReadOnly(True)
-        self.setFrameStyle(QtWidgets.QFrame.NoFrame)
-        self._default_format = QtGui.QTextCharFormat()
-        self._text_format = QtGui.QTextCharFormat()
-        self.setLineWrapMode(QtWidgets.QTextEdit.NoWrap)
+    for column, run_state in runs:
+        if column > end:
+            break
+        after = run_state
+
+    spliced = [run for run in runs if run[0] < start]
+    spliced.append((start, state))
+    spliced.append((end, after))
+    spliced.extend(run for run in runs if run[0] > end)
+
+    merged = []
+
+    for run in spliced:
+        if not merged or merged[-1][1] != run[1]:
+            merged.append(run)
+
+    if len(merged) == 1 and merged[0][1] == _DEFAULT_STATE:
+        return None
+
+    return merged
+
+
+def _overwrite(cursor, text, text_format):
+    if not text:
+        return
+
+    block_length = cursor.block().length() - 1
+    nb_remaining = block_length - cursor.positionInBlock()
+
+    cursor.movePosition(QtGui.QTextCursor.Right,
+                        QtGui.QTextCursor.KeepAnchor,
+                        min(len(text), nb_remaining))
+    cursor.insertText(text, text_format)
 
-        p = self.palette()
-        p.setColor(QtGui.QPalette.Base, self.style.BACKGROUND)
-        p.setColor(QtGui.QPalette.Text, self.style.WHITE)
-        self.setPalette(p)
 
-    def _foreground(self, color):
-        if color is None:
-            color = self._default_format.foreground()
-        self._text_format.setForeground(color)
+def _parse_codes(params):
+    return [int(code) if code.isdigit() else 0
+            for code in params.replace(':', ';').split(';')]
 
-    def _background(self, color):
-        if color is None:
-            color = self._default_format.background()
-        self._text_format.setBackground(color)
 
-    def _apply_code(self, code):
+def _extended_color(codes, default):
+    # 38;5;n selects from the 256 color palette, 38;2;r;g;b is truecolor
+
+    mode = next(codes, None)
+
+    if mode == 5:
+        return min(next(codes, 0), 255)
+
+    if mode == 2:
+        return tuple(min(next(codes, 0), 255) for _ in range(3))
+
+    return default
+
+
+@functools.lru_cache(maxsize=1024)
+def _select_graphic_rendition(state, params):
+    foreground, background, bold = state
+
+    codes = iter(_parse_codes(params))
+
+    for code in codes:
         if code == 0:
-            self._text_format.setFontWeight(self._text_format.fontWeight())
-            self._foreground(None)
-            self._background(None)
+            foreground, background, bold = None, None, False
         elif code == 1:
-            self._text_format.setFontWeight(QtGui.QFont.Bold)
-        elif code == 30:
-            self._foreground(self.style.BLACK)
-        elif code == 31:
-            self._foreground(self.style.RED)
-        elif code == 32:
-            self._foreground(self.style.GREEN)
-        elif code == 33:
-            self._foreground(self.style.YELLOW)
-        elif code == 34:
-            self._foreground(self.style.BLUE)
-        elif code == 35:
-            self._foreground(self.style.MAGENTA)
-        elif code == 36:
-            self._foreground(self.style.CYAN)
-        elif code == 37:
-            self._foreground(self.style.WHITE)
+            bold = True
+        elif code in (2, 22):
+            bold = False
+        elif 30 <= code <= 37:
+            foreground = code - 30
+        elif 90 <= code <= 97:
+            foreground = code - 90 + 8
+        elif 40 <= code <= 47:
+            background = code - 40
+        elif 100 <= code <= 107:
+            background = code - 100 + 8
         elif code == 39:
-            self._foreground(None)
-        elif code == 40:
-            self._background(self.style.BLACK)
-        elif code == 41:
-            self._background(self.style.RED)
-        elif code == 42:
-            self._background(self.style.GREEN)
-        elif code == 43:
-            self._background(self.style.YELLOW)
-        elif code == 44:
-            self._background(self.style.BLUE)
-        elif code == 45:
-            self._background(self.style.MAGENTA)
-        elif code == 46:
-            self._background(self.style.CYAN)
-        elif code == 47:
-            self._background(self.style.WHITE)
+            foreground = None
         elif code == 49:
-            self._background(None)
+            background = None
+        elif code == 38:
+            foreground = _extended_color(codes, foreground)
+        elif code == 48:
+            background = _extended_color(codes, background)
 
-    def write(self, text):
-        cursor = self.textCursor()
-        cursor.movePosition(QtGui.QTextCursor.End)
+    return foreground, background, bold
 
-        npos = 0
 
-        while True:
-            start = text.find('\033[', npos)
+def _ansi_color(style, value):
+    if isinstance(value, tuple):
+        return QtGui.QColor(*value)
 
-            if start < 0:
-                cursor.insertText(text[npos:], self._text_format)
-                break
+    if value < 16:
+        color = [style.BLACK, style.RED, style.GREEN, style.YELLOW,
+                 style.BLUE, style.MAGENTA, style.CYAN,
+                 style.WHITE][value % 8]
+        return color.lighter(130) if value >= 8 else color
 
-            if start != npos:
-                cursor.insertText(text[npos:start], self._text_format)
+    if value < 232:
+        # 6x6x6 color cube
+        levels = [0, 95, 135, 175, 215, 255]
+        value -= 16
+        return QtGui.QColor(levels[value // 36], levels[value // 6 % 6],
+                            levels[value % 6])
 
-            end = text.find('m', start + 2)
+    gray = 8 + (value - 232) * 10
+    return QtGui.QColor(gray, gray, gray)
 
-            for code in map(int, text[start+2:end].split(';')):
-                self._apply_code(code)
 
-            npos = end + 1
+class _ConsoleQueue(QtCore.QObject):
+    # output of stdout and stderr in the order it was written. Entries are
+    # (style, text) where style is a (prefix, suffix) pair of escape codes
 
-        self.setTextCursor(cursor)
-        self.ensureCursorVisible()
+    _written = QtCore.pyqtSignal()
+
+    def __init__(self, console):
+        super(_ConsoleQueue, self).__init__()
+
+        self._console = console
+        self._queue = collections.deque()
+        self._scheduled = False
+
+        self._written.connect(self._deliver, QtCore.Qt.QueuedConnection)
+
+    def write(self, style, text):
+        # safe from any thread: deque.append is atomic and the console is
+        # only touched from the queued slot running on the GUI thread
+
+        self._queue.append((style, text))
+
+        if not self._scheduled:
+            self._scheduled = True
+            self._written.emit()
+
+    def flush(self):
+        if QtCore.QThread.currentThread() == self.thread():
+            self._deliver()
+            self._console.flush()
+
+    def _deliver(self):
+        self._scheduled = False
+
+        style = None
+        chunks = []
+
+        while self._queue:
+            entry_style, text = self._queue.popleft()
+
+            if entry_style != style:
+                self._write(style, chunks)
+                style = entry_style
+                chunks = []
+
+            chunks.append(text)
+
+        self._write(style, chunks)
+
+    def _write(self, style, chunks):
+        text = ''.join(chunks)
+
+        if text:
+            prefix, suffix = style
+            self._console.write(prefix + text + suffix)
+
+
+class ConsoleStream(io.TextIOBase):
+    # file object replacing sys.stdout or sys.stderr. Streams sharing a
+    # queue keep the order of their output
+
+    def __init__(self, queue, prefix='', suffix=''):
+        super(ConsoleStream, self).__init__()
+
+        self._queue = queue
+        self._style = prefix, suffix
+
+    @property
+    def encoding(self):
+        return 'utf-8'
+
+    @property
+    def errors(self):
+        return 'strict'
+
+    def writable(self):
+        return True
+
+    def isatty(self):
+        return False
+
+    def write(self, text):
+        self._queue.write(self._style, text)
+        return len(text)
 
     def flush(self):
+        self._queue.flush()
+
+    def close(self):
+        # the console belongs to the window, there is nothing to release
         pass
 
 
-def copy_to_clipboard(content):
+class CellFormat(object):
+    notations = ('general', 'fixed', 'scientific', 'engineering')
+
+    def __init__(self, precision=None, notation='general', nan='nan',
+                 inf='inf'):
+        if notation not in self.notations:
+            raise ValueError(f'Invalid notation "{notation}"')
+
+        self.precision = precision
+        self.notation = notation
+        self.nan = nan
+        self.inf = inf
+
+
+ARRAY_MIME_TYPE = 'application/x-python-ui-npy'
+
+
+def _chunk_to_text(chunk, delimiter):
+    # the shortest text that reads back to the same value, like str(). The
+    # exact values are kept in the .npy payload anyway
+
+    if chunk.dtype.names:
+        columns = [chunk[name].astype(str).tolist()
+                   for name in chunk.dtype.names]
+        rows = zip(*columns)
+    else:
+        rows = chunk.reshape(len(chunk), -1).astype(str).tolist()
+
+    return ''.join(delimiter.join(row) + '\n' for row in rows)
+
+
+def _array_to_text(array, fmt=None, delimiter='\t', chunk_size=10000):
+    import numpy as np
+
+    array = np.asarray(array)
+
+    if array.ndim == 0:
+        return str(array)
+
+    header = ''
+
+    if array.dtype.names:
+        # one column per field
+        array = array.reshape(-1)
+        header = delimiter.join(array.dtype.names) + '\n'
+    else:
+        # 1-D arrays become a column, higher dimensions are stacked along
+        # the last axis
+        if array.ndim > 2:
+            array = array.reshape(-1, array.shape[-1])
+
+    buffer = io.StringIO()
+    buffer.write(header)
+
+    for start in range(0, len(array), chunk_size):
+        chunk = array[start:start + chunk_size]
+        if fmt is None:
+            buffer.write(_chunk_to_text(chunk, delimiter))
+        else:
+            np.savetxt(buffer, chunk, fmt=fmt, delimiter=delimiter)
+
+    return buffer.getvalue().rstrip('\n')
+
+
+def copy_to_clipboard(content, fmt=None, delimiter='\t', chunk_size=10000):
     cb = QtWidgets.QApplication.clipboard()
 
-    if isinstance(content, np.ndarray):
-        content = '\n'.join('\t'.join(map(str, row)) for row in content)
+    np = sys.modules.get('numpy')
+
+    if np and isinstance(content, np.ndarray):
+        mime_data = QtCore.QMimeData()
+        mime_data.setText(_array_to_text(content, fmt, delimiter, chunk_size))
+
+        # the raw array lets other windows paste it without parsing text
+
+        if not content.dtype.hasobject:
+            buffer = io.BytesIO()
+            np.save(buffer, content, allow_pickle=False)
+            mime_data.setData(ARRAY_MIME_TYPE, buffer.getvalue())
+
+        cb.clear(mode=cb.Clipboard)
+        cb.setMimeData(mime_data, mode=cb.Clipboard)
+        return
 
     cb.clear(mode=cb.Clipboard)
     cb.setText(content, mode=cb.Clipboard)
@@ -267,13 +1777,38 @@ class WidgetBuilder(object):
         label_widget = QtWidgets.QLabel(label)
         self._add_widget(label_widget)
 
-    def add_button(self, label, action):
+    def add_button(self, label, action, background=False):
         button_widget = QtWidgets.QPushButton(label)
         self._add_widget(button_widget)
 
-        if len(inspect.signature(action).parameters) == 0:
-            button_widget.clicked.connect(action)
+        if background:
+            parameters = inspect.signature(action).parameters
+            args = (self.context,) if set(parameters) - {'task'} else ()
+
+            # an ApplicationWindow runs the action with its executor
+            start = getattr(self.context, 'run_task', run_task)
+
+            if getattr(self.context, 'executor', None) == 'process':
+                if parameters:
+                    raise TypeError(f'Button "{label}" runs in a process, '
+                                    'its action cannot take arguments')
+                try:
+                    pickle.dumps(action)
+                except Exception as e:
+                    raise TypeError(f'Button "{label}" runs in a process, '
+                                    f'its action cannot be pickled: {e}')
+
+            def run():
+                button_widget.setEnabled(False)
+                task = start(action, *args)
+                task.done.connect(lambda: button_widget.setEnabled(True))
+
+            button_widget.clicked.connect(run)
+        elif len(inspect.signature(action).parameters) == 0:
+            action = profiler.wrap(f'Button "{label}"', action)
+            button_widget.clicked.connect(lambda: action())
         else:
+            action = profiler.wrap(f'Button "{label}"', action)
             button_widget.clicked.connect(lambda: action(self.context))
 
     def add_textbox(self, label, option, prefix=None, postfix=None,
@@ -303,8 +1838,9 @@ class WidgetBuilder(object):
 
         if option:
             option.connect(lambda value: textbox_widget.setText(str(value)))
-            textbox_widget.editingFinished.connect(
-                lambda: option.change(textbox_widget.text()))
+            if not readonly:
+                textbox_widget.editingFinished.connect(
+                    lambda: option.change(textbox_widget.text()))
 
         if postfix:
             postfix_widget = QtWidgets.QLabel(postfix)
@@ -335,8 +1871,8 @@ class WidgetBuilder(object):
             spinbox_widget.setValue(option.value)
         elif dtype is float:
             spinbox_widget = QtWidgets.QDoubleSpinBox()
-            spinbox_widget.setMinimum(minimum or -Qt.qInf())
-            spinbox_widget.setMaximum(maximum or Qt.qInf())
+            spinbox_widget.setMinimum(minimum or -math.inf)
+            spinbox_widget.setMaximum(maximum or math.inf)
             spinbox_widget.setSingleStep(step or 0.1)
             spinbox_widget.setDecimals(decimals or 5)
             spinbox_widget.setValue(option.value)
@@ -413,8 +1949,8 @@ class WidgetBuilder(object):
 
         group_layout.addWidget(content_widget)
 
-    def add_tabs(self, items, option=None):
-        tabs_widget = TabsWidget(self.context)
+    def add_tabs(self, items, option=None, lazy=False, unload_after=None):
+        tabs_widget = TabsWidget(self.context, lazy, unload_after)
         self._add_widget(tabs_widget)
 
         for label, widget_type in items:
@@ -424,76 +1960,50 @@ class WidgetBuilder(object):
             option.connect(tabs_widget.setCurrentIndex)
             tabs_widget.currentChanged.connect(option.change)
 
-    def add_stack(self, items, option=None):
-        stack_widget = StackWidget(self.context, items, option)
+    def add_stack(self, items, option=None, lazy=False, unload_after=None):
+        stack_widget = StackWidget(self.context, items, option, lazy,
+                                   unload_after)
         self._add_widget(stack_widget)
 
-    def add_pages(self, items, option=None):
-        pages_widget = PagesWidget(self.context, items, option)
+    def add_pages(self, items, option=None, lazy=False, unload_after=None):
+        pages_widget = PagesWidget(self.context, items, option, lazy,
+                                   unload_after)
         self._add_widget(pages_widget)
 
-    def add_array(self, option, label=None, readonly=False):
+    def add_array(self, option, label=None, readonly=False, formats=None,
+                  heatmap=False, sortable=False):
         if label:
             label_widget = QtWidgets.QLabel(label)
             self._add_widget(label_widget)
 
-        table_widget = QtWidgets.QTableWidget()
-        if readonly:
-            table_widget.setEditTriggers(
-                QtWidgets.QAbstractItemView.NoEditTriggers)
-
-        def update_table(array):
-            table_widget.blockSignals(True)
-
-            shape = np.shape(array)
-
-            if len(shape) == 1:
-                rows, = shape
-                table_widget.setRowCount(rows)
-                table_widget.setColumnCount(1)
-
-                table_widget.setVerticalHeaderLabels(map(str, range(rows)))
-                table_widget.setHorizontalHeaderLabels(['0'])
-
-                for (i,), value in np.ndenumerate(array):
-                    value_str = str(value)
-                    table_widget.setItem(i, 0,
-                                         QtWidgets.QTableWidgetItem(value_str))
-            elif len(shape) == 2:
-                rows, cols = shape
-                table_widget.setRowCount(rows)
-                table_widget.setColumnCount(cols)
-
-                table_widget.setVerticalHeaderLabels(map(str, range(rows)))
-                table_widget.setHorizontalHeaderLabels(map(str, range(cols)))
+        from .array_model import ArrayModel, ArraySliceControls, ArrayView
 
-                for (i, j), value in np.ndenumerate(array):
-                    value_str = str(value)
-                    table_widget.setItem(i, j,
-                                         QtWidgets.QTableWidgetItem(value_str))
-            else:
-                raise Exception('Arrays with dimension > 2 not supported')
-
-            table_widget.blockSignals(False)
-
-        def update_cell(row, col):
-            shape = np.shape(option.value)
-
-            value = float(table_widget.item(row, col).text())
+        model = ArrayModel(option.value, readonly)
+        model.set_formats(formats)
+        model.set_heatmap(heatmap)
 
-            if len(shape) == 1:
-                option.value[row] = value
-            elif len(shape) == 2:
-                option.value[row, col] = value
-            else:
-                raise Exception('Arrays with dimension > 2 not supported')
+        slice_controls = ArraySliceControls(model)
+        self._add_widget(slice_controls)
+        slice_controls.rebuild()
 
-            option.emit()
+        table_widget = ArrayView()
+        table_widget.setModel(model)
+        table_widget.verticalHeader().setSectionResizeMode(
+            QtWidgets.QHeaderView.Fixed)
+        table_widget.horizontalHeader().setSectionResizeMode(
+            QtWidgets.QHeaderView.Interactive)
 
-        update_table(option.value)
+        if sortable:
+            # start unsorted, sorting by column -1 restores the order
+            table_widget.horizontalHeader().setSortIndicator(
+                -1, QtCore.Qt.AscendingOrder)
+            table_widget.setSortingEnabled(True)
+            model.sort_reset.connect(
+                lambda: table_widget.horizontalHeader().setSortIndicator(
+                    -1, QtCore.Qt.AscendingOrder))
 
-        option.connect(update_table)
-        table_widget.cellChanged.connect(update_cell)
+        option.connect(model.set_array)
+        model.edited.connect(option.emit)
 
         self._add_widget(table_widget)
 
@@ -559,8 +2069,78 @@ class Widget(QtWidgets.QWidget):
         pass
 
 
+class _LazyPage(QtWidgets.QWidget):
+    def __init__(self, widget_type, context, lazy=False, unload_after=None):
+        super(_LazyPage, self).__init__()
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+
+        self._widget_type = widget_type
+        self._context = context
+        self._connections = []
+
+        self.widget = None
+
+        if unload_after:
+            self._unload_timer = QtCore.QTimer(self)
+            self._unload_timer.setSingleShot(True)
+            self._unload_timer.setInterval(int(unload_after * 1000))
+            self._unload_timer.timeout.connect(self.unload)
+        else:
+            self._unload_timer = None
+
+        if not lazy:
+            self.build()
+
+    def build(self):
+        if self.widget is not None:
+            return self.widget
+
+        with Option._track_connections() as connections:
+            widget = self._widget_type()
+
+            builder = WidgetBuilder(widget._ground, self._context)
+            widget.build(builder)
+
+        self._connections = connections
+
+        self.layout().addWidget(widget)
+        self.widget = widget
+
+        return widget
+
+    def unload(self):
+        if self.widget is None or self.isVisible():
+            return
+
+        for option, connection in self._connections:
+            option.disconnect(connection)
+
+        self._connections = []
+
+        self.widget.setParent(None)
+        self.widget.deleteLater()
+        self.widget = None
+
+    def showEvent(self, event):
+        if self._unload_timer:
+            self._unload_timer.stop()
+
+        self.build()
+
+        super(_LazyPage, self).showEvent(event)
+
+    def hideEvent(self, event):
+        if self._unload_timer:
+            self._unload_timer.start()
+
+        super(_LazyPage, self).hideEvent(event)
+
+
 class StackWidget(QtWidgets.QWidget):
-    def __init__(self, context, items, option):
+    def __init__(self, context, items, option, lazy=False, unload_after=None):
         super(StackWidget, self).__init__()
 
         layout = QtWidgets.QVBoxLayout(self)
@@ -572,10 +2152,7 @@ class StackWidget(QtWidgets.QWidget):
         self._stack = stack
 
         for widget_type in items:
-            widget = widget_type()
-
-            builder = WidgetBuilder(widget._ground, context)
-            widget.build(builder)
+            widget = _LazyPage(widget_type, context, lazy, unload_after)
 
             if stack.count() != 0:
                 widget.setSizePolicy(QtWidgets.QSizePolicy.Ignored,
@@ -603,7 +2180,7 @@ class StackWidget(QtWidgets.QWidget):
 
 
 class PagesWidget(QtWidgets.QWidget):
-    def __init__(self, context, pages, option):
+    def __init__(self, context, pages, option, lazy=False, unload_after=None):
         super(PagesWidget, self).__init__()
 
         layout = QtWidgets.QVBoxLayout(self)
@@ -619,10 +2196,7 @@ class PagesWidget(QtWidgets.QWidget):
         self._stack = stack
 
         for label, widget_type in pages:
-            content = widget_type()
-
-            builder = WidgetBuilder(content._ground, context)
-            content.build(builder)
+            content = _LazyPage(widget_type, context, lazy, unload_after)
 
             self._add_page(label, content)
 
@@ -663,15 +2237,15 @@ class PagesWidget(QtWidgets.QWidget):
 
 
 class TabsWidget(QtWidgets.QTabWidget):
-    def __init__(self, context):
+    def __init__(self, context, lazy=False, unload_after=None):
         super(TabsWidget, self).__init__()
         self.context = context
+        self.lazy = lazy
+        self.unload_after = unload_after
 
     def add_tab(self, label, widget_type=None):
-        widget = widget_type()
-
-        builder = WidgetBuilder(widget._ground, self.context)
-        widget.build(builder)
+        widget = _LazyPage(widget_type, self.context, self.lazy,
+                           self.unload_after)
 
         widget.setContentsMargins(8, 8, 8, 8)
 
@@ -697,48 +2271,6 @@ class Sidebar(QtWidgets.QScrollArea):
         self.setMinimumWidth(400)
 
 
-class PlotCanvas(QtWidgets.QWidget):
-    def __init__(self, parent):
-        super(PlotCanvas, self).__init__()
-
-        layout = QtWidgets.QGridLayout()
-        layout.setContentsMargins(0, 0, 0, 0)
-        layout.setSpacing(0)
-        self.setLayout(layout)
-
-        figure = Figure()
-        canvas = FigureCanvasQTAgg(figure)
-        canvas.setContentsMargins(0, 0, 0, 0)
-        layout.addWidget(canvas, 1, 1, 1, 1)
-        self._canvas = canvas
-
-        toolbar = NavigationToolbar2QT(canvas, self)
-        layout.addWidget(toolbar, 2, 1, 1, 1)
-
-        plot = figure.add_subplot(111)
-        plot.set_aspect('equal')
-        self._plot = plot
-
-    def redraw(self):
-        plot = self._plot
-
-        figure = plot.get_figure()
-
-        for ax in figure.axes[1:]:
-            figure.delaxes(ax)
-
-        figure.subplots_adjust()
-
-        plot.clear()
-
-        self.plot(plot)
-
-        self._canvas.draw()
-    
-    def plot(self, ax):
-        pass
-
-
 class Wheel(QtWidgets.QDial):
     scaled_value_changed = QtCore.pyqtSignal(float)
 
@@ -758,11 +2290,12 @@ class Wheel(QtWidgets.QDial):
         self.valueChanged.connect(self.on_value_changed)
 
     def on_value_changed(self, value):
-        old_angle = self._value / 180 * np.pi
-        new_angle = value / 180 * np.pi
+        old_angle = math.radians(self._value)
+        new_angle = math.radians(value)
 
-        delta = np.round(np.arccos(np.cos(old_angle - new_angle)) * 180 / np.pi)
-        sign = np.sign(-np.sin(old_angle - new_angle))
+        delta = round(math.degrees(math.acos(math.cos(old_angle - new_angle))))
+        direction = -math.sin(old_angle - new_angle)
+        sign = (direction > 0) - (direction < 0)
 
         _value = int(self._value + sign * delta)
 
@@ -786,10 +2319,69 @@ class Wheel(QtWidgets.QDial):
         self.setValue(value)
 
 
+class ProfilerWidget(QtWidgets.QWidget):
+    def __init__(self):
+        super(ProfilerWidget, self).__init__()
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+
+        table = QtWidgets.QTableWidget(0, 5)
+        table.setHorizontalHeaderLabels(['Name', 'Calls', 'Total ms',
+                                         'Mean ms', 'Max ms'])
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        table.horizontalHeader().setSectionResizeMode(
+            0, QtWidgets.QHeaderView.Stretch)
+        layout.addWidget(table)
+        self._table = table
+
+        reset_button = QtWidgets.QPushButton('Reset')
+        reset_button.clicked.connect(profiler.reset)
+        reset_button.clicked.connect(self.refresh)
+        layout.addWidget(reset_button)
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.timeout.connect(self.refresh)
+
+    def refresh(self):
+        stats = sorted(profiler.stats().items(),
+                       key=lambda item: -item[1]['total'])
+
+        table = self._table
+        table.setRowCount(len(stats))
+
+        for row, (name, item) in enumerate(stats):
+            values = [name, str(item['count']),
+                      f'{item["total"] * 1000:.2f}',
+                      f'{item["mean"] * 1000:.3f}',
+                      f'{item["max"] * 1000:.3f}']
+
+            for col, value in enumerate(values):
+                table.setItem(row, col, QtWidgets.QTableWidgetItem(value))
+
+    def showEvent(self, event):
+        self.refresh()
+        self._timer.start(500)
+
+    def hideEvent(self, event):
+        self._timer.stop()
+
+
 class ApplicationWindow(QtWidgets.QWidget):
-    def __init__(self, title='', size=(1200, 800), content=None):
+    def __init__(self, title='', size=(1200, 800), content=None,
+                 max_lines=None, max_bytes=None, history_file=None,
+                 executor='thread', max_workers=None, instrument=False,
+                 console='text'):
         super(ApplicationWindow, self).__init__()
 
+        if executor not in ('thread', 'process'):
+            raise ValueError(f'Invalid executor "{executor}"')
+
+        self.executor = executor
+        self.max_workers = max_workers
+
         self.resize(*size)
         self.setWindowTitle(title)
 
@@ -799,9 +2391,29 @@ class ApplicationWindow(QtWidgets.QWidget):
         self.setLayout(layout)
 
         self.content = content(parent=self) if content else None
-        self.console = Console()
+        if console == 'text':
+            console_type = Console
+        elif console == 'log':
+            console_type = LogConsole
+        else:
+            raise ValueError(f'Invalid console "{console}"')
+
+        self.console = console_type(max_lines=max_lines, max_bytes=max_bytes,
+                                    history_file=history_file)
         self.sidebar = Sidebar()
 
+        output = _ConsoleQueue(self.console)
+        self._stdout = ConsoleStream(output)
+        self._stderr = ConsoleStream(output, Fore.RED, Fore.RESET)
+
+        if instrument:
+            profiler.enable()
+
+        self._profiler_dialog = None
+
+        shortcut = QtWidgets.QShortcut(QtGui.QKeySequence('F12'), self)
+        shortcut.activated.connect(self.toggle_profiler)
+
         if content:
             vsplitter = QtWidgets.QSplitter(QtCore.Qt.Vertical)
             vsplitter.addWidget(self.content)
@@ -835,6 +2447,14 @@ class ApplicationWindow(QtWidgets.QWidget):
 
         app.exec_()
 
+        # the window may never be hidden, e.g. when the application quits
+        # while it is still shown. Prints after the event loop must not
+        # reach the console stream anymore
+
+        widget._restore_streams()
+
+        _shutdown_process_pool()
+
     def show_dialog(self, widget_type, title='', size=None, modal=True,
                     action=None):
         dialog = QtWidgets.QDialog(self, QtCore.Qt.Tool |
@@ -864,6 +2484,25 @@ class ApplicationWindow(QtWidgets.QWidget):
 
         dialog.show()
 
+    def toggle_profiler(self):
+        if self._profiler_dialog is None:
+            dialog = QtWidgets.QDialog(self, QtCore.Qt.Tool |
+                                             QtCore.Qt.WindowCloseButtonHint)
+            dialog.setWindowTitle('Profiler')
+            dialog.resize(600, 400)
+
+            layout = QtWidgets.QGridLayout()
+            dialog.setLayout(layout)
+            layout.addWidget(ProfilerWidget())
+
+            self._profiler_dialog = dialog
+
+        if self._profiler_dialog.isVisible():
+            self._profiler_dialog.hide()
+        else:
+            profiler.enable()
+            self._profiler_dialog.show()
+
     def show_open_file_dialog(self, title=None, extension_filters=None):
         if isinstance(extension_filters, list):
             extension_filter = ';;'.join(extension_filters)
@@ -886,15 +2525,37 @@ class ApplicationWindow(QtWidgets.QWidget):
 
         return result
 
+    def run_task(self, fn, *args, **kwargs):
+        if self.executor == 'process':
+            _process_pool(self.max_workers)
+            kwargs.setdefault('process', True)
+
+        return run_task(fn, *args, **kwargs)
+
     def show_error_dialog(self, message):
         QtWidgets.QMessageBox.critical(self, 'Error', message)
 
     def showEvent(self, event):
+        if sys.stdout is self._stdout:
+            return
+
         self._old_stdout = sys.stdout
-        sys.stdout = self.console
+        self._old_stderr = sys.stderr
+        sys.stdout = self._stdout
+        sys.stderr = self._stderr
 
     def hideEvent(self, event):
+        self._restore_streams()
+
+    def _restore_streams(self):
+        if sys.stdout is not self._stdout:
+            return
+
         sys.stdout = self._old_stdout
+        sys.stderr = self._old_stderr
+
+        self._stdout.flush()
+        self._stderr.flush()
 
     def _build(self, context):
         sidebar_builder = WidgetBuilder(self.sidebar._ground, context)
@@ -905,3 +2566,11 @@ class ApplicationWindow(QtWidgets.QWidget):
 
     def _started(self):
         pass
+
+
+def __getattr__(name):
+    # PlotCanvas used to be defined here, it imports matplotlib on demand
+    if name == 'PlotCanvas':
+        from .plot_canvas import PlotCanvas
+        return PlotCanvas
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
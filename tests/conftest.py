@@ -0,0 +1,11 @@
+import os
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import pytest
+from PyQt5 import QtWidgets
+
+
+@pytest.fixture(scope='session')
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
@@ -0,0 +1,151 @@
+import numpy as np
+import pytest
+from PyQt5 import QtCore
+
+from python_ui.array_model import ArrayModel
+
+
+def record(model):
+    events = []
+
+    def on_changed(top_left, bottom_right, roles=()):
+        events.append(('changed', (top_left.row(), top_left.column()),
+                       (bottom_right.row(), bottom_right.column())))
+
+    model.dataChanged.connect(on_changed)
+    model.rowsInserted.connect(
+        lambda parent, first, last: events.append(('rows+', first, last)))
+    model.rowsRemoved.connect(
+        lambda parent, first, last: events.append(('rows-', first, last)))
+    model.columnsInserted.connect(
+        lambda parent, first, last: events.append(('cols+', first, last)))
+    model.columnsRemoved.connect(
+        lambda parent, first, last: events.append(('cols-', first, last)))
+    model.modelReset.connect(lambda: events.append(('reset',)))
+
+    return events
+
+
+@pytest.fixture
+def model(app):
+    return ArrayModel(np.zeros((10, 4)))
+
+
+def test_unchanged_array_emits_nothing(model):
+    events = record(model)
+
+    model.set_array(np.zeros((10, 4)))
+
+    assert events == []
+
+
+def test_diff_emits_changed_ranges(model):
+    events = record(model)
+
+    array = np.zeros((10, 4))
+    array[2:4, 1] = 1
+    array[7, 3] = 2
+
+    model.set_array(array)
+
+    assert events == [('changed', (2, 1), (3, 1)),
+                      ('changed', (7, 3), (7, 3))]
+    assert model.data(model.index(3, 1)) == '1.0'
+
+
+def test_diff_handles_nan(app):
+    model = ArrayModel(np.array([[np.nan, 1.0]]))
+    events = record(model)
+
+    model.set_array(np.array([[np.nan, 1.0]]))
+
+    assert events == []
+
+
+def test_growing_inserts_rows_and_columns(model):
+    events = record(model)
+
+    model.set_array(np.ones((12, 6)))
+
+    assert ('rows+', 10, 11) in events
+    assert ('cols+', 4, 5) in events
+    assert ('reset',) not in events
+    assert (model.rowCount(), model.columnCount()) == (12, 6)
+    assert model.data(model.index(11, 5)) == '1.0'
+
+
+def test_shrinking_removes_rows_and_columns(model):
+    events = record(model)
+
+    model.set_array(np.zeros((8, 3)))
+
+    assert ('rows-', 8, 9) in events
+    assert ('cols-', 3, 3) in events
+    assert (model.rowCount(), model.columnCount()) == (8, 3)
+
+
+def test_dtype_change_resets(model):
+    events = record(model)
+
+    model.set_array(np.zeros((10, 4), dtype=int))
+
+    assert events == [('reset',)]
+
+
+def column(model, col=0):
+    return [model.data(model.index(row, col))
+            for row in range(model.rowCount())]
+
+
+def test_growing_after_display(app):
+    model = ArrayModel(np.arange(30.0).reshape(10, 3))
+    column(model, 2)
+
+    model.set_array(np.arange(36.0).reshape(12, 3))
+
+    assert column(model, 0)[-2:] == ['30.0', '33.0']
+
+
+def test_edit_sorted_table_writes_source_row(app):
+    array = np.array([[3.0, 0.0], [1.0, 1.0], [2.0, 2.0]])
+    model = ArrayModel(array)
+    model.sort(0)
+
+    assert column(model) == ['1.0', '2.0', '3.0']
+    assert [model.headerData(row, QtCore.Qt.Vertical)
+            for row in range(3)] == ['1', '2', '0']
+
+    model.setData(model.index(0, 1), '9')
+
+    assert array[1].tolist() == [1.0, 9.0]
+
+
+def test_sorted_table_is_sorted_again(app):
+    model = ArrayModel(np.array([[3.0], [1.0], [2.0]]))
+    model.sort(0, QtCore.Qt.DescendingOrder)
+
+    model.set_array(np.array([[3.0], [1.0], [2.0], [0.0], [5.0]]))
+
+    assert column(model) == ['5.0', '3.0', '2.0', '1.0', '0.0']
+
+    model.setData(model.index(0, 0), '-1')
+
+    assert column(model) == ['3.0', '2.0', '1.0', '0.0', '-1.0']
+
+
+def test_heatmap_repaints_column_when_range_changes(app):
+    model = ArrayModel(np.array([[1.0], [3.0]]))
+    model.set_heatmap(True)
+
+    background = model.data(model.index(1, 0), QtCore.Qt.BackgroundRole)
+
+    events = []
+    model.dataChanged.connect(
+        lambda top_left, bottom_right, roles: events.append(
+            (top_left.row(), bottom_right.row(), list(roles))))
+
+    model.setData(model.index(0, 0), '100')
+
+    assert (0, 1, [QtCore.Qt.BackgroundRole]) in events
+    assert model.data(model.index(1, 0),
+                      QtCore.Qt.BackgroundRole) != background
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+from PyQt5 import QtCore, QtWidgets
+
+from python_ui import copy_to_clipboard
+from python_ui.array_model import ArrayModel, ArrayView
+
+
+@pytest.fixture
+def view(app):
+    view = ArrayView()
+    view.setModel(ArrayModel(np.zeros((4, 3))))
+
+    edits = []
+    view.model().edited.connect(lambda: edits.append(True))
+    view.edits = edits
+
+    return view
+
+
+def select(view, top, left, bottom, right):
+    model = view.model()
+    selection = QtCore.QItemSelection(model.index(top, left),
+                                      model.index(bottom, right))
+    view.setCurrentIndex(model.index(top, left))
+    view.selectionModel().select(
+        selection, QtCore.QItemSelectionModel.ClearAndSelect)
+
+
+def test_paste_text_block(view):
+    QtWidgets.QApplication.clipboard().setText('1\t2\n3\t4')
+    select(view, 1, 1, 1, 1)
+
+    view.paste()
+
+    expected = np.zeros((4, 3))
+    expected[1:3, 1:3] = [[1, 2], [3, 4]]
+
+    np.testing.assert_array_equal(view.model().block(0, 0, 3, 2), expected)
+    assert view.edits == [True]
+
+
+def test_paste_is_clipped_to_the_table(view):
+    copy_to_clipboard(np.ones((5, 5)))
+    select(view, 2, 1, 2, 1)
+
+    view.paste()
+
+    block = view.model().block(0, 0, 3, 2)
+
+    assert block[2:, 1:].all()
+    assert not block[:2].any() and not block[:, 0].any()
+    assert view.edits == [True]
+
+
+def test_paste_single_value_fills_selection(view):
+    QtWidgets.QApplication.clipboard().setText('7')
+    select(view, 0, 0, 1, 2)
+
+    view.paste()
+
+    block = view.model().block(0, 0, 3, 2)
+
+    assert (block[:2] == 7).all()
+    assert not block[2:].any()
+    assert view.edits == [True]
+
+
+def test_paste_rejects_invalid_blocks(view):
+    copy_to_clipboard(np.ones((2, 2, 2)))
+    select(view, 0, 0, 0, 0)
+
+    view.paste()
+
+    QtWidgets.QApplication.clipboard().setText('a\tb')
+
+    view.paste()
+
+    assert not view.model().block(0, 0, 3, 2).any()
+    assert view.edits == []
+
+
+
+def test_copy_and_paste_structured_array(app):
+    array = np.zeros(3, dtype=[('a', float), ('b', int)])
+    array['a'] = [1.5, 2.5, 3.5]
+    array['b'] = [1, 2, 3]
+
+    view = ArrayView()
+    view.setModel(ArrayModel(array))
+
+    select(view, 0, 0, 0, 1)
+    view.copy()
+
+    select(view, 2, 0, 2, 0)
+    view.paste()
+
+    assert array[2].tolist() == (1.5, 1)
+
+    QtWidgets.QApplication.clipboard().setText('b\ta\n7\t8.5')
+    select(view, 1, 0, 1, 0)
+    view.paste()
+
+    assert array[1].tolist() == (8.5, 7)
@@ -0,0 +1,89 @@
+import pytest
+from PyQt5 import QtGui
+
+from python_ui.python_ui import Console, LogConsole
+
+
+@pytest.fixture(params=[Console, LogConsole])
+def console(request, app):
+    return request.param()
+
+
+def write(console, *texts):
+    for text in texts:
+        console.write(text)
+    console.flush()
+
+
+def foreground(console, row, column):
+    # palette index of the text color at a position, None for the default
+
+    if isinstance(console, LogConsole):
+        state = None, None, False
+        for start, run_state in console._runs[row] or []:
+            if start <= column:
+                state = run_state
+        return state[0]
+
+    block = console.document().findBlockByNumber(row)
+    cursor = QtGui.QTextCursor(block)
+    cursor.setPosition(block.position() + column + 1)
+
+    if not cursor.charFormat().hasProperty(
+            QtGui.QTextFormat.ForegroundBrush):
+        return None
+
+    color = cursor.charFormat().foreground().color()
+
+    return 1 if color == console.style.RED else color.name()
+
+
+def test_escape_sequence_split_across_writes(console):
+    write(console, 'a\x1b[3', '1mred\x1b[', '0m b\n')
+
+    assert console.toPlainText().startswith('ared b')
+    assert foreground(console, 0, 0) is None
+    assert foreground(console, 0, 1) == 1
+    assert foreground(console, 0, 5) is None
+
+
+def test_malformed_sequence_is_dropped(console):
+    write(console, 'a\x1b\x1b[31mb\x1b[0m\n')
+
+    assert console.toPlainText().startswith('ab\n')
+
+
+
+def test_carriage_return_overwrites_line(console):
+    write(console, 'abc\rX\n', '10%\r', '20%\r', '100%\n')
+
+    assert console.toPlainText().splitlines() == ['Xbc', '100%']
+
+
+def test_erase_line(console):
+    write(console, 'progress 10%\x1b[2K\rdone\n')
+    write(console, 'abcdef\x1b[3D\x1b[K!\n')
+
+    assert console.toPlainText().splitlines() == ['done', 'abc!']
+
+
+@pytest.mark.parametrize('console_type', [Console, LogConsole])
+def test_trimmed_lines_are_kept_in_history_file(app, tmp_path,
+                                                console_type):
+    history_file = tmp_path / 'history.log'
+    history_file.write_text('previous session\n')
+
+    console = console_type(max_lines=3, history_file=str(history_file))
+
+    assert history_file.read_text() == ''
+
+    write(console, ''.join(f'line {i}\n' for i in range(6)))
+
+    assert console.toPlainText().splitlines() == ['line 4', 'line 5']
+    assert history_file.read_text() == 'line 0\nline 1\nline 2\nline 3\n'
+
+    log_file = tmp_path / 'saved.log'
+    console.save_log(str(log_file))
+
+    assert log_file.read_text().splitlines() == [f'line {i}'
+                                                 for i in range(6)]
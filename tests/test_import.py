@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = '''
+import sys
+import time
+
+start = time.perf_counter()
+import python_ui
+duration = time.perf_counter() - start
+
+for module in ['numpy', 'matplotlib']:
+    assert module not in sys.modules, f'{module} imported by python_ui'
+
+print(duration)
+'''
+
+
+def test_import_is_lazy():
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    result = subprocess.run([sys.executable, '-c', SCRIPT], cwd=ROOT,
+                            env=env, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert float(result.stdout) < 1.0
+
+
+def test_plot_canvas_is_loaded_on_demand():
+    script = ('import sys\n'
+              'from python_ui.python_ui import PlotCanvas\n'
+              'import python_ui\n'
+              'assert python_ui.PlotCanvas is PlotCanvas\n'
+              'assert "matplotlib" in sys.modules\n')
+
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    result = subprocess.run([sys.executable, '-c', script], cwd=ROOT,
+                            env=env, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr